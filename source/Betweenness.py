@@ -0,0 +1,276 @@
+#----------------------------------------------------------------------
+# Betweenness
+#
+# Contains the Brandes algorithm for betweenness centrality over the CSR
+# arrays of a compact graph, with the sources split across a process pool,
+# and its estimate from a sample of pivot sources with confidence intervals
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import GraphTraversal as gt
+import numpy as np
+import multiprocessing
+import math
+import time
+
+class Brandes:
+    """ Betweenness accumulator: for each source, a breadth first search
+        counts the shortest paths level by level and the dependencies are
+        propagated back along the shortest path edges. The arrays are
+        allocated once and reset only on the nodes reached by each search.
+    """
+
+    def __init__(self, indptr, indices):
+        """ Constructor
+
+            @type indptr: array
+            @param indptr: CSR row pointers
+            @type indices: array
+            @param indices: CSR column indices (out-neighbors)
+        """
+        n = len(indptr) - 1
+        self.bfs = gt.BreadthFirstSearch(indptr, indices)
+        self.sigma = np.zeros(n) # number of shortest paths from the source
+        self.delta = np.zeros(n) # dependency of the source on each node
+        self.position = np.zeros(n, dtype=np.int64) # position in its level
+
+    def dependencies(self, source):
+        """ Compute the dependencies of a source on the nodes it reaches
+
+            @type source: integer
+            @param source: node id of the source
+
+            @rtype: tuple
+            @return: the nodes reached (but the source) and their dependency
+        """
+        bfs = self.bfs
+        sigma = self.sigma
+        delta = self.delta
+        position = self.position
+        bfs.run(source, dag=True)
+        levels = bfs.levels
+
+        ''' number of shortest paths, level by level '''
+        sigma[source] = 1.0
+        for i, (u, v) in enumerate(bfs.dag):
+            position[levels[i+1]] = np.arange(len(levels[i+1]))
+            sigma[levels[i+1]] = np.bincount(position[v], weights=sigma[u],
+                                             minlength=len(levels[i+1]))
+
+        ''' dependencies, from the farthest level back '''
+        for i in range(len(bfs.dag) - 1, -1, -1):
+            u, v = bfs.dag[i]
+            position[levels[i]] = np.arange(len(levels[i]))
+            delta[levels[i]] += np.bincount(position[u], weights=sigma[u]/sigma[v]*(1.0 + delta[v]),
+                                            minlength=len(levels[i]))
+
+        reached = bfs.visited()[1:]
+        values = delta[reached].copy()
+        delta[levels[0]] = 0.0
+        delta[reached] = 0.0
+        return reached, values
+
+    def accumulate(self, sources, scores=None):
+        """ Sum the dependencies of some sources
+
+            @type sources: array
+            @param sources: node ids of the sources
+            @type scores: array
+            @param scores: scores to add to (default: new zero scores)
+
+            @rtype: array
+            @return: the partial betweenness of each node
+        """
+        if scores is None:
+            scores = np.zeros(len(self.sigma))
+        for source in sources:
+            reached, values = self.dependencies(source)
+            scores[reached] += values
+        return scores
+
+
+''' ========= process pool ========= '''
+worker = None # the Brandes accumulator of a worker process
+
+def initWorker(indptr, indices):
+    """ Allocate the buffers of a worker process, once for all its tasks """
+    global worker
+    worker = Brandes(indptr, indices)
+
+
+def accumulateSources(sources):
+    """ Partial betweenness of some sources (run by the workers) """
+    return worker.accumulate(sources)
+
+
+def betweenness(graph, processes=None, sources=None):
+    """ Compute the betweenness centrality of each node of a graph (Brandes
+        algorithm, shortest paths along the out-edges). The sources are split
+        in chunks across a pool of processes, each worker reuses its buffers
+        and the partial scores are summed at the end.
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type processes: integer
+        @param processes: number of processes (default: the number of
+                          cores), 1 to compute in this process
+        @type sources: array
+        @param sources: node ids of the sources (default: all the nodes)
+
+        @rtype: array
+        @return: the betweenness of each node id
+    """
+    indptr, indices = graph.csr()
+    n = len(indptr) - 1
+    if sources is None:
+        sources = np.arange(n)
+    sources = np.asarray(sources, dtype=np.int64)
+    sources = sources[np.diff(indptr)[sources] > 0] # the others reach nobody
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes == 1 or len(sources) < 2*processes:
+        return Brandes(indptr, indices).accumulate(sources)
+
+    chunks = np.array_split(sources, 4*processes)
+    pool = multiprocessing.Pool(processes, initWorker, (np.asarray(indptr), np.asarray(indices)))
+    try:
+        partials = pool.map(accumulateSources, chunks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    return np.sum(partials, axis=0)
+
+
+''' ========= sampling ========= '''
+def normalQuantile(confidence):
+    """ Return z such that a standard normal variable is in [-z, z] with
+        probability confidence (bisection on math.erf)
+    """
+    low, high = 0.0, 40.0
+    for i in range(100):
+        middle = (low + high) / 2
+        if math.erf(middle / math.sqrt(2)) < confidence:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def topSeparated(estimate, halfWidth, k):
+    """ Return True if the confidence intervals of the k highest estimates are
+        all above the intervals of the other nodes, i.e. the top-k set is
+        known with the confidence of the intervals
+    """
+    order = np.argsort(-estimate, kind="mergesort")
+    if k >= len(order):
+        return True
+    top = order[:k]
+    rest = order[k:]
+    return (estimate[top] - halfWidth[top]).min() > (estimate[rest] + halfWidth[rest]).max()
+
+
+def sampledBetweenness(graph, samples=None, seconds=None, epsilon=None, k=None,
+                       confidence=0.95, rng=None, batchSize=16):
+    """ Estimate the betweenness centrality from a sample of pivot sources
+        drawn uniformly without replacement: the dependencies of the pivots
+        are scaled by n / pivots, which is unbiased, and their per-node
+        variance (with the finite population correction) gives a confidence
+        interval of each estimate. Pivots are drawn in batches until a budget
+        is met: a number of pivots, a time, or an accuracy (adaptive
+        stopping); once every node is a pivot the result is exact.
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type samples: integer
+        @param samples: max number of pivots (default: 1000 if no other
+                        budget is given)
+        @type seconds: real
+        @param seconds: max running time
+        @type epsilon: real
+        @param epsilon: stop when the half width of the intervals is at most
+                        epsilon times the estimate, for the k highest nodes
+                        (which must also be separated from the others, see
+                        topSeparated) or, without k, for the highest one
+        @type k: integer
+        @param k: size of the top set of interest
+        @type confidence: real
+        @param confidence: confidence level of the intervals
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: pivots between two checks of the budget
+
+        @rtype: tuple
+        @return: the estimated betweenness and the half width of its
+                 confidence interval for each node id, and a dictionary with
+                 the number of pivots ("samples"), the time ("seconds"), the
+                 "confidence" and, with k, whether the top-k set is
+                 "separated"
+    """
+    if rng is None:
+        rng = np.random
+    if samples is None and seconds is None and epsilon is None:
+        samples = 1000
+    indptr, indices = graph.csr()
+    n = len(indptr) - 1
+    z = normalQuantile(confidence)
+    brandes = Brandes(indptr, indices)
+    total = np.zeros(n)
+    squares = np.zeros(n)
+    estimate = np.zeros(n)
+    halfWidth = np.zeros(n)
+    pivots = rng.permutation(n)
+    drawn = 0
+    start = time.time()
+    while drawn < n and (samples is None or drawn < samples):
+        size = batchSize if samples is None else min(batchSize, samples - drawn)
+        for pivot in pivots[drawn:drawn + size]:
+            reached, values = brandes.dependencies(pivot)
+            total[reached] += values
+            squares[reached] += values**2
+        drawn = min(drawn + size, n)
+
+        ''' estimates and confidence intervals '''
+        mean = total / drawn
+        variance = np.maximum(squares / drawn - mean**2, 0.0) * drawn / max(drawn - 1, 1)
+        estimate = n*mean
+        halfWidth = z*n*np.sqrt(variance / drawn * (n - drawn) / max(n - 1, 1))
+
+        if seconds is not None and time.time() - start >= seconds:
+            break
+        if epsilon is not None and drawn >= 2*batchSize:
+            if k is None:
+                top = np.array([np.argmax(estimate)])
+            else:
+                top = np.argsort(-estimate, kind="mergesort")[:k]
+            if (halfWidth[top] <= epsilon*estimate[top]).all() and \
+               (k is None or topSeparated(estimate, halfWidth, k)):
+                break
+
+    info = {"samples": drawn, "seconds": time.time() - start, "confidence": confidence}
+    if k is not None:
+        info["separated"] = topSeparated(estimate, halfWidth, k)
+    return estimate, halfWidth, info
+
+
+if __name__ == "__main__":
+    import CompactDirectedGraph as cg
+
+    ''' ====== TEST BETWEENNESS ===== '''
+    graph = cg.CompactDirectedGraph(filename="./../data/Wiki_Vote.txt")
+    for processes in [1, None]:
+        start = time.time()
+        scores = betweenness(graph, processes)
+        print "--> processes: %s (seconds)" % processes
+        print time.time() - start
+    print "--> top 5 nodes"
+    top = np.argsort(-scores)[:5]
+    print zip(graph.labels[top], scores[top])
+
+    start = time.time()
+    estimate, halfWidth, info = sampledBetweenness(graph, epsilon=0.1, k=5)
+    print "--> top 5 nodes, sampled (seconds)"
+    print time.time() - start
+    top = np.argsort(-estimate)[:5]
+    print zip(graph.labels[top], estimate[top], halfWidth[top])
+    print info
@@ -0,0 +1,187 @@
+#----------------------------------------------------------------------
+# Centrality
+#
+# Contains spectral centralities (eigenvector, Katz) computed by iteration
+# with sparse matrix-vector products over the CSR arrays of a compact graph,
+# and the selection of the nodes with the highest scores
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import numpy as np
+
+def neighborSum(indptr, indices, x):
+    """ Sparse matrix-vector product with the adjacency matrix: element i of
+        the result is the sum of x over the out-neighbors of i
+
+        @type indptr: array
+        @param indptr: CSR row pointers
+        @type indices: array
+        @param indices: CSR column indices (out-neighbors)
+        @type x: array
+        @param x: a vector, or a matrix with one vector per column
+
+        @rtype: array
+        @return: the product, with the shape of x
+    """
+    n = len(indptr) - 1
+    y = np.zeros((n,) + x.shape[1:])
+    rows = np.flatnonzero(np.diff(indptr) > 0) # reduceat needs non-empty rows
+    if len(rows) > 0:
+        y[rows] = np.add.reduceat(x[indices], indptr[rows], axis=0)
+    return y
+
+
+def topIndices(scores, k, keys=None):
+    """ Select the k highest scores with a partition (O(n) plus the sort of
+        the k selected): the result is ranked from the highest and the ties
+        are broken deterministically by the smallest key
+
+        @type scores: array
+        @param scores: the scores
+        @type k: integer
+        @param k: number of scores to select
+        @type keys: array
+        @param keys: tie breaking key of each score (default: the position)
+
+        @rtype: array
+        @return: the positions of the k highest scores, ranked
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    k = max(min(int(k), n), 0)
+    if keys is None:
+        keys = np.arange(n)
+    keys = np.asarray(keys)
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k] # the k-th highest
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)
+        tied = tied[np.argsort(keys[tied], kind="mergesort")][:k - len(above)]
+        selected = np.concatenate((above, tied))
+    else:
+        selected = np.arange(n)
+    return selected[np.lexsort((keys[selected], -scores[selected]))]
+
+
+def eigenvector(graph, tolerance=1.0e-6, max_iter=1000, start=None):
+    """ Eigenvector centrality by power iteration: x <- x + A x, normalized
+        by its maximum (adding x makes the iteration converge on any graph,
+        periodic ones included), until the largest change of an element is
+        at most tolerance.
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type tolerance: real
+        @param tolerance: max change of an element at convergence
+        @type max_iter: integer
+        @param max_iter: max number of iterations
+        @type start: array
+        @param start: starting vector, e.g. the result on a similar graph
+                      (default: uniform)
+
+        @rtype: tuple
+        @return: the centrality of each node id (the highest is 1), the
+                 number of iterations and the last change (residual)
+    """
+    indptr, indices = graph.csr()
+    n = len(indptr) - 1
+    if start is None or not (np.asarray(start) > 0).any():
+        x = np.ones(n)
+    else:
+        x = np.asarray(start, dtype=float)
+        x = x / x.max()
+    residual = float("inf")
+    iterations = 0
+    while n > 0 and iterations < max_iter and residual > tolerance:
+        y = x + neighborSum(indptr, indices, x)
+        y /= y.max()
+        residual = np.abs(y - x).max()
+        x = y
+        iterations += 1
+    return x, iterations, residual
+
+
+def katz(graph, alpha=0.125, tolerance=1.0e-6, max_iter=1000, direction="out"):
+    """ Katz centrality, as the sum of the series x <- alpha M (x + 1): the
+        centrality of a node is alpha times the sum over its neighbors of
+        their centrality plus one. Several attenuation factors are computed
+        at once by stacking their iterates as the columns of a matrix, so a
+        sweep costs one pass over the edges per iteration. A column stops
+        when its largest change is at most tolerance times its largest
+        element; the series diverges when alpha is not below the inverse of
+        the spectral radius, then the column stops when it grows too large
+        (its normalized values approach the eigenvector centrality).
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type alpha: real or list
+        @param alpha: attenuation factor(s)
+        @type tolerance: real
+        @param tolerance: max relative change at convergence
+        @type max_iter: integer
+        @param max_iter: max number of iterations
+        @type direction: string
+        @param direction: "out": sum over the out-neighbors (M = A), "in":
+                          sum over the in-neighbors (M = A transposed)
+
+        @rtype: tuple
+        @return: the centrality of each node id normalized by the highest
+                 (one column per alpha if alpha is a list), the number of
+                 iterations and whether each series converged
+    """
+    if direction == "out":
+        indptr, indices = graph.csr()
+    elif direction == "in":
+        indptr, indices = graph.reverseCSR()
+    else:
+        raise ValueError("direction must be 'out' or 'in'")
+    alphas = np.atleast_1d(np.asarray(alpha, dtype=float))
+    n = len(indptr) - 1
+    x = np.zeros((n, len(alphas)))
+    active = np.ones(len(alphas), dtype=bool)
+    converged = np.zeros(len(alphas), dtype=bool)
+    iterations = 0
+    while n > 0 and active.any() and iterations < max_iter:
+        columns = np.flatnonzero(active)
+        y = alphas[columns] * neighborSum(indptr, indices, x[:, columns] + 1.0)
+        change = np.abs(y - x[:, columns]).max(axis=0)
+        top = y.max(axis=0)
+        x[:, columns] = y
+        iterations += 1
+        done = change <= tolerance*top
+        converged[columns[done]] = True
+        active[columns[done | (top > 1.0e100)]] = False # converged or diverging
+
+    top = x.max(axis=0)
+    x /= np.where(top > 0, top, 1.0)
+    if np.ndim(alpha) == 0:
+        return x[:, 0], iterations, converged[0]
+    return x, iterations, converged
+
+
+if __name__ == "__main__":
+    import CompactDirectedGraph as cg
+    import time
+
+    ''' ====== TEST EIGENVECTOR ===== '''
+    graph = cg.CompactDirectedGraph(filename="./../data/Wiki_Vote.txt")
+    start = time.time()
+    x, iterations, residual = eigenvector(graph)
+    print "--> iterations, residual (seconds)"
+    print iterations, residual, time.time() - start
+    top = np.argsort(-x)[:5]
+    print zip(graph.labels[top], x[top])
+    print "--> warm start"
+    print eigenvector(graph, tolerance=1.0e-9, start=x)[1:]
+
+    ''' ====== TEST KATZ ===== '''
+    alphas = [0.005, 0.01, 0.02, 0.05, 0.125]
+    start = time.time()
+    x, iterations, converged = katz(graph, alphas)
+    print "--> katz: iterations, converged (seconds)"
+    print iterations, converged, time.time() - start
+    for i, alpha in enumerate(alphas):
+        top = np.argsort(-x[:, i])[:5]
+        print alpha, graph.labels[top]
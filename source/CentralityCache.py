@@ -0,0 +1,163 @@
+#----------------------------------------------------------------------
+# CentralityCache
+#
+# Contains a cache of centrality results keyed on the centrality measure,
+# its parameters and the version of the graph, optionally persisted next
+# to the edge list file of the graph
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import GraphCache as gc
+import numpy as np
+import collections
+import hashlib
+import os
+
+class CentralityCache:
+    """ Least recently used cache of centrality results. Each entry holds the
+        version of the graph it was computed on (see
+        NaiveDirectedGraph.version): entries of other versions are dropped,
+        so a result is never served after the graph changed.
+        If a file name is given, results of the graph as read from the file
+        are also saved next to it (see path) along with the size and the
+        modification time of the file, so later runs load them instead of
+        computing them.
+    """
+
+    def __init__(self, size=16, filename="", fileVersion=None, variant=""):
+        """ Constructor
+
+            @type size: integer
+            @param size: max number of results kept in memory
+            @type filename: string
+            @param filename: edge list file of the graph, to persist the
+                             results (default: results are not persisted)
+            @type fileVersion: version
+            @param fileVersion: version of the graph as read from filename
+            @type variant: string
+            @param variant: how the graph was read from filename (e.g. the
+                            type of its labels): results persisted for other
+                            variants are not used
+        """
+        self.size = size
+        self.filename = filename
+        self.fileVersion = fileVersion
+        self.variant = variant
+        self.entries = collections.OrderedDict() # key -> (version, result, info)
+
+    def key(self, centrality, params):
+        """ Return the key of a result (lists of parameters become tuples) """
+        items = []
+        for name in sorted(params):
+            value = params[name]
+            if isinstance(value, (list, np.ndarray)):
+                value = tuple(np.asarray(value).tolist())
+            items.append((name, value))
+        return (centrality, tuple(items))
+
+    def path(self, key):
+        """ Return the name of the file of a persisted result: the edge list
+            file name, the centrality, a digest of the parameters and the
+            suffix of the graph cache (e.g. Wiki_Vote.txt.b-1a2b3c4d.csr)
+        """
+        digest = hashlib.md5(self.stamp(key).encode("utf-8")).hexdigest()[:8]
+        return "%s.%s-%s%s" % (self.filename, key[0], digest, gc.CACHE_SUFFIX)
+
+    def stamp(self, key):
+        """ Return the description of a persisted result: the variant of the
+            graph and the parameters
+        """
+        return repr((self.variant, key[1]))
+
+    def persistent(self, version):
+        """ Return True if results of this version of the graph are persisted """
+        return len(self.filename) > 0 and version == self.fileVersion
+
+    def get(self, centrality, params, version):
+        """ Return a result and the details of its computation, None if it
+            is not in the cache
+
+            @type centrality: string
+            @param centrality: name of the centrality measure
+            @type params: dictionary
+            @param params: parameters of the measure
+            @type version: version
+            @param version: current version of the graph
+
+            @rtype: tuple
+            @return: the centrality of each node and the details of the
+                     computation (see put)
+        """
+        key = self.key(centrality, params)
+        for stale in [k for k in self.entries if self.entries[k][0] != version]:
+            del self.entries[stale]
+        if key in self.entries:
+            entry = self.entries.pop(key)
+            self.entries[key] = entry # most recently used
+            return entry[1], entry[2]
+        if self.persistent(version) and os.path.exists(self.path(key)):
+            try:
+                arrays, meta = gc.loadArrays(self.path(key), mmap=False)
+                if meta.get("source") == gc.sourceStamp(self.filename) and \
+                   meta.get("params") == self.stamp(key):
+                    result = dict(zip(arrays["labels"].tolist(), arrays["scores"].tolist()))
+                    info = meta.get("info")
+                    if isinstance(info, dict): # JSON keys are unicode
+                        info = dict((str(name), value) for name, value in info.items())
+                    self.put(centrality, params, version, result, info, save=False)
+                    return result, info
+            except (IOError, OSError, ValueError, KeyError):
+                pass # unreadable file: compute the result again
+        return None
+
+    def put(self, centrality, params, version, result, info=None, save=True):
+        """ Add a result to the cache, dropping the least recently used one
+            if the cache is full
+
+            @type centrality: string
+            @param centrality: name of the centrality measure
+            @type params: dictionary
+            @param params: parameters of the measure
+            @type version: version
+            @param version: version of the graph the result was computed on
+            @type result: dictionary
+            @param result: the centrality of each node
+            @type info: dictionary
+            @param info: details of the computation (e.g. iterations), kept
+                         with the result (JSON serializable to be persisted)
+            @type save: boolean
+            @param save: if True the result is persisted too (when the graph
+                         is the one of the file)
+        """
+        key = self.key(centrality, params)
+        self.entries.pop(key, None)
+        self.entries[key] = (version, result, info)
+        while len(self.entries) > max(self.size, 0):
+            self.entries.popitem(last=False)
+        if save and isinstance(result, dict) and self.persistent(version):
+            try:
+                gc.saveArrays(self.path(key), {"labels": np.asarray(list(result.keys())),
+                                               "scores": np.asarray(list(result.values()))},
+                              {"source": gc.sourceStamp(self.filename), "params": self.stamp(key),
+                               "info": info})
+            except (IOError, OSError, ValueError, TypeError):
+                pass # the result is kept in memory anyway
+
+    def clear(self):
+        """ Drop every result kept in memory """
+        self.entries.clear()
+
+
+if __name__ == "__main__":
+
+    ''' ====== TEST CACHE ===== '''
+    cache = CentralityCache(size=2)
+    cache.put("e", {"confidence": 0.01}, 1, {"a": 1.0, "b": 0.5}, {"iterations": 12})
+    cache.put("k", {"alpha": [0.1, 0.2]}, 1, {"a": 0.3, "b": 1.0})
+    print "--> hit"
+    print cache.get("e", {"confidence": 0.01}, 1)
+    cache.put("b", {}, 1, {"a": 0.0, "b": 0.0})
+    print "--> evicted (least recently used)"
+    print cache.get("k", {"alpha": [0.1, 0.2]}, 1)
+    print "--> stale (the graph changed)"
+    print cache.get("e", {"confidence": 0.01}, 2)
@@ -0,0 +1,526 @@
+#----------------------------------------------------------------------
+# CompactDirectedGraph
+#
+# Contains the class which implements a directed graph stored in
+# compressed sparse row (CSR) arrays
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import NaiveDirectedGraph as ng
+import EdgeListIO as io
+import numpy as np
+import collections
+
+''' ========= array helpers ========= '''
+def indexType(n):
+    """ Return the smallest integer dtype able to store a node id of a graph
+        with n nodes
+
+        @type n: integer
+        @param n: number of nodes
+    """
+    if n < 2**31:
+        return np.int32
+    return np.int64
+
+
+def buildCSR(n, src, dst):
+    """ Build the CSR arrays of a graph from two arrays of node ids.
+        Duplicated edges are dropped (as readGraph does with sets) and the
+        neighbors of each node are sorted.
+
+        @type n: integer
+        @param n: number of nodes
+        @type src: array of integers
+        @param src: source id of each edge
+        @type dst: array of integers
+        @param dst: destination id of each edge
+
+        @rtype: tuple
+        @return: indptr (n+1 offsets) and indices (neighbor ids)
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    if len(src) > 0:
+        codes = np.unique(src*n + dst) # sorts by (src, dst) and drops duplicates
+        src = codes // n
+        dst = codes - src*n
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst.astype(indexType(n))
+
+
+def internLabels(tokens):
+    """ Intern an array of node labels to dense integer ids in one vectorized
+        pass. The returned labels are sorted, so a label can be found back
+        with a binary search.
+
+        @type tokens: array
+        @param tokens: node labels (integers or strings)
+
+        @rtype: tuple
+        @return: the sorted unique labels and the id of each token
+    """
+    if tokens.dtype.kind in "iu" and len(tokens) > 0:
+        low = tokens.min()
+        span = int(tokens.max() - low) + 1
+        if span <= 4*len(tokens): # dense ids: a lookup table avoids sorting
+            present = np.zeros(span, dtype=bool)
+            present[tokens - low] = True
+            labels = np.flatnonzero(present) + low
+            table = np.cumsum(present) - 1
+            return labels, table[tokens - low].astype(indexType(len(labels)))
+    labels, ids = np.unique(tokens, return_inverse=True)
+    return labels, ids.astype(indexType(len(labels)))
+
+
+class CompactGraphView(collections.Mapping):
+    """ Read only dictionary-like view of a CompactDirectedGraph: maps each
+        vertex to the list of its neighbors, so that the code written for
+        graphDict (DirectedNetworkAnalyzer, Epidemics, drawGraph) can run on
+        the compact representation.
+    """
+
+    def __init__(self, graph):
+        """ Constructor
+
+            @type graph: CompactDirectedGraph
+            @param graph: the graph to wrap
+        """
+        self.graph = graph
+
+    def __getitem__(self, vertex):
+        i = self.graph.idOf(vertex)
+        if i is None:
+            raise KeyError(vertex)
+        return self.graph.neighborsOf(i)
+
+    def __iter__(self):
+        return iter(self.graph.vertices())
+
+    def __len__(self):
+        return self.graph.numOfVertices()
+
+    def __contains__(self, vertex):
+        return self.graph.idOf(vertex) is not None
+
+
+class CompactDirectedGraph(ng.NaiveDirectedGraph):
+    """ Directed graph stored in CSR arrays. Extends NaiveDirectedGraph.
+        Node labels are interned to dense integer ids in [0, n-1]:
+        - labels[i] is the label of the node with id i
+        - the out-neighbors of node i are indices[indptr[i]:indptr[i+1]]
+
+        getGraph() returns a dictionary-like view, so the graph can be passed
+        wherever a graphDict is expected.
+    """
+
+    '''========= constructor ========='''
+    def __init__(self, graphDict={}, filename="", edges=None, labels=None,
+                 csr=None, cache=False, mmap=True, reverseIndex=False):
+        """ Constructor
+
+            @type graphDict: graph
+            @param graphDict: a graph in a dictionary structure
+            @type filename: string
+            @param filename: name of the file containing the graph (node
+                             labels are integers when the file has only
+                             integer ids)
+            @type edges: tuple
+            @param edges: a pair of arrays (src, dst) of node ids
+            @type labels: array
+            @param labels: label of each node id when edges or csr is passed
+                           (default: the ids themselves)
+            @type csr: tuple
+            @param csr: a pair of arrays (indptr, indices), used as they are
+            @type cache: boolean
+            @param cache: if True filename is loaded through its binary cache
+                          file (see GraphCache.readCachedArrays)
+            @type mmap: boolean
+            @param mmap: if True the cached arrays are memory-mapped
+            @type reverseIndex: boolean
+            @param reverseIndex: if True the reverse CSR arrays (in-neighbors
+                                 of each node) are built with the graph
+        """
+        if len(filename) > 0 and cache:
+            import GraphCache as gc
+            labels, indptr, indices, self.header = gc.readCachedArrays(filename, mmap)
+            csr = (indptr, indices)
+        elif len(filename) > 0:
+            labels, src, dst, self.header = io.readEdgeList(filename)
+            edges = (src, dst)
+        if csr is not None:
+            indptr, indices = csr
+            if labels is None:
+                labels = np.arange(len(indptr) - 1)
+            self.setCSR(np.asarray(labels), indptr, indices)
+        elif edges is not None:
+            src, dst = edges
+            if labels is None:
+                n = 0
+                if len(src) > 0:
+                    n = int(max(np.max(src), np.max(dst))) + 1
+                labels = np.arange(n)
+            self.setEdges(np.asarray(labels), src, dst)
+        else:
+            self.setDict(graphDict)
+        self.setGraph(CompactGraphView(self))
+        if reverseIndex:
+            self.reverseCSR()
+
+    '''========= building methods ========='''
+    def setEdges(self, labels, src, dst):
+        """ Replace the graph with the one described by the arrays of edges
+
+            @type labels: array
+            @param labels: label of each node id
+            @type src: array of integers
+            @param src: source id of each edge
+            @type dst: array of integers
+            @param dst: destination id of each edge
+        """
+        indptr, indices = buildCSR(len(labels), src, dst)
+        self.setCSR(labels, indptr, indices)
+
+    def setCSR(self, labels, indptr, indices):
+        """ Replace the graph with the one described by the CSR arrays (they
+            are not copied, so they can be memory-mapped)
+
+            @type labels: array
+            @param labels: label of each node id
+            @type indptr: array of integers
+            @param indptr: offsets of the neighbors of each node in indices
+            @type indices: array of integers
+            @param indices: neighbor ids, sorted for each node
+        """
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self._inDegrees = None
+        self._reverseCSR = None
+        self._index = None # label -> id, only needed when labels are not sorted
+        if labels.dtype == object or (len(labels) > 1 and not np.all(labels[1:] > labels[:-1])):
+            self._index = dict(zip(labels.tolist(), range(len(labels))))
+        self._newLabels = []
+        self._newSrc = []
+        self._newDst = []
+        self._newEdges = set() # (id1, id2) of the buffered edges
+        self._newOut = {} # id -> out-degree in the buffered edges
+        self._newIn = {} # id -> in-degree in the buffered edges
+        self._triangleIndex = None
+        self._version = getattr(self, "_version", 0) + 1
+
+    def setDict(self, graphDict):
+        """ Replace the graph with the one stored in a dictionary structure
+
+            @type graphDict: graph
+            @param graphDict: a graph in a dictionary structure
+        """
+        keys = list(graphDict.keys())
+        counts = [len(graphDict[k]) for k in keys]
+        flat = [v for k in keys for v in graphDict[k]]
+        allLabels = keys + flat
+        if len(allLabels) == 0:
+            labels, ids = np.arange(0), np.arange(0)
+        elif len(set(type(x) for x in allLabels)) == 1 and np.asarray(allLabels).dtype.kind in "iuSU":
+            ''' homogeneous labels: intern them with a vectorized pass '''
+            labels, ids = internLabels(np.asarray(allLabels))
+        else:
+            ''' mixed labels: intern them in order of appearance '''
+            index = {}
+            ids = np.empty(len(allLabels), dtype=np.int64)
+            for i, x in enumerate(allLabels):
+                if x not in index:
+                    index[x] = len(index)
+                ids[i] = index[x]
+            labels = np.empty(len(index), dtype=object)
+            for x in index:
+                labels[index[x]] = x
+        src = np.repeat(ids[:len(keys)], counts)
+        self.setEdges(labels, src, ids[len(keys):])
+
+    def _flush(self):
+        """ Merge the vertices and the edges added with addVertex and addEdge
+            into the CSR arrays
+        """
+        if len(self._newLabels) == 0 and len(self._newSrc) == 0:
+            return
+        n = len(self.labels)
+        src = np.repeat(np.arange(n), np.diff(self.indptr))
+        src = np.concatenate((src, np.asarray(self._newSrc, dtype=np.int64)))
+        dst = np.concatenate((self.indices, np.asarray(self._newDst, dtype=np.int64)))
+        labels = self.labels
+        if len(self._newLabels) > 0:
+            new = np.asarray(self._newLabels)
+            if new.dtype.kind == labels.dtype.kind and labels.dtype.kind in "iuSU":
+                labels = np.concatenate((labels, new))
+            else:
+                labels = np.array(labels.tolist() + self._newLabels, dtype=object)
+        self.labels = labels
+        self.indptr, self.indices = buildCSR(len(labels), src, dst)
+        self._inDegrees = None
+        self._reverseCSR = None
+        self._newLabels = []
+        self._newSrc = []
+        self._newDst = []
+        self._newEdges = set()
+        self._newOut = {}
+        self._newIn = {}
+
+    def _hasEdge(self, i, j):
+        """ Return True if the edge between the node ids i and j is in the
+            CSR arrays or among the buffered edges (O(log out-degree))
+        """
+        if (i, j) in self._newEdges:
+            return True
+        if i >= len(self.labels) or j >= len(self.labels):
+            return False
+        row = self.indices[self.indptr[i]:self.indptr[i+1]]
+        k = int(np.searchsorted(row, j))
+        return k < len(row) and row[k] == j
+
+    def _labelIndex(self):
+        """ Return the dictionary label -> id, building it if needed """
+        if self._index is None:
+            self._index = dict(zip(self.labels.tolist(), range(len(self.labels))))
+        return self._index
+
+    '''========= graph get methods ========='''
+    def getGraph(self):
+        """ Return a dictionary-like view of the graph """
+        return self.graphDict
+
+    def toCompact(self):
+        """ Return the graph in the compact structure (the graph itself) """
+        return self
+
+    def toDict(self):
+        """ Return a copy of the graph in a dictionary structure """
+        graph = {}
+        for i, vertex in enumerate(self.vertices()):
+            graph[vertex] = set(self.neighborsOf(i))
+        return graph
+
+    def csr(self):
+        """ Return the CSR arrays of the graph
+
+            @rtype: tuple
+            @return: indptr and indices arrays
+        """
+        self._flush()
+        return self.indptr, self.indices
+
+    def reverseCSR(self):
+        """ Return the CSR arrays of the reverse graph (the in-neighbors of
+            node i are rindices[rindptr[i]:rindptr[i+1]]). They are built once
+            with a vectorized pass and rebuilt only after the graph changes.
+
+            @rtype: tuple
+            @return: rindptr and rindices arrays
+        """
+        self._flush()
+        if self._reverseCSR is None:
+            n = len(self.labels)
+            src = np.repeat(np.arange(n), np.diff(self.indptr))
+            self._reverseCSR = buildCSR(n, self.indices, src)
+        return self._reverseCSR
+
+    def getReverseGraph(self):
+        """ Return a dictionary-like view of the reverse graph: each vertex
+            is mapped to its in-neighbors
+        """
+        rindptr, rindices = self.reverseCSR()
+        return CompactDirectedGraph(csr=(rindptr, rindices), labels=self.labels).getGraph()
+
+    def inNeighbors(self, vertex):
+        """ Return the list of the in-neighbors of a vertex
+
+            @type vertex: vertex
+            @param vertex: vertex of the graph
+        """
+        rindptr, rindices = self.reverseCSR()
+        i = self.idOf(vertex)
+        return self.labels[rindices[rindptr[i]:rindptr[i+1]]].tolist()
+
+    def idOf(self, vertex):
+        """ Return the integer id of a vertex, None if the vertex is not in
+            the graph
+
+            @type vertex: vertex
+            @param vertex: label of the vertex
+        """
+        if self._index is not None:
+            return self._index.get(vertex)
+        try:
+            i = int(np.searchsorted(self.labels, vertex))
+            if i < len(self.labels) and self.labels[i] == vertex:
+                return i
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    def neighborsOf(self, i):
+        """ Return the list of the labels of the out-neighbors of a node
+
+            @type i: integer
+            @param i: id of the node
+        """
+        self._flush()
+        return self.labels[self.indices[self.indptr[i]:self.indptr[i+1]]].tolist()
+
+    def vertices(self):
+        """ Return the vertices of a graph """
+        self._flush()
+        return self.labels.tolist()
+
+    def edges(self):
+        """ Return a list of the edges of the graph
+            (Edges need to be generated).
+            Useful for visualization.
+        """
+        self._flush()
+        src = self.labels[np.repeat(np.arange(len(self.labels)), np.diff(self.indptr))]
+        dst = self.labels[self.indices]
+        return [{u, v} for u, v in zip(src.tolist(), dst.tolist())]
+
+    def numOfEdges(self):
+        """ Return the number of the edges of a graph (buffered edges
+            included, without merging them)
+        """
+        return len(self.indices) + len(self._newSrc)
+
+    def numOfVertices(self):
+        """ Return the number of the vertices of a graph """
+        return len(self.labels) + len(self._newLabels)
+
+    def outDegrees(self):
+        """ Return the array of the out-degrees (indexed by node id) """
+        degrees = np.zeros(self.numOfVertices(), dtype=np.int64)
+        degrees[:len(self.labels)] = np.diff(self.indptr)
+        np.add.at(degrees, self._newSrc, 1)
+        return degrees
+
+    def _baseInDegrees(self):
+        """ Return the in-degrees in the CSR arrays, computed once and kept
+            until the arrays change
+        """
+        if self._inDegrees is None:
+            self._inDegrees = np.bincount(self.indices, minlength=len(self.labels))
+        return self._inDegrees
+
+    def inDegrees(self):
+        """ Return the array of the in-degrees (indexed by node id). The
+            in-degrees of the CSR arrays are computed once and kept until the
+            arrays change, buffered edges are added to a copy.
+        """
+        if len(self._newLabels) == 0 and len(self._newDst) == 0:
+            return self._baseInDegrees()
+        degrees = np.zeros(self.numOfVertices(), dtype=np.int64)
+        degrees[:len(self.labels)] = self._baseInDegrees()
+        np.add.at(degrees, self._newDst, 1)
+        return degrees
+
+    def outDegree(self, vertex):
+        """ Return the out-degree of a vertex
+
+            @type vertex: vertex
+            @param vertex: vertex of the graph
+
+            @raise KeyError: if the vertex is not in the graph
+        """
+        i = self.idOf(vertex)
+        if i is None:
+            raise KeyError(vertex)
+        degree = self._newOut.get(i, 0)
+        if i < len(self.labels):
+            degree += int(self.indptr[i+1] - self.indptr[i])
+        return degree
+
+    def inDegree(self, vertex):
+        """ Return the in-degree of a vertex
+
+            @type vertex: vertex
+            @param vertex: vertex of the graph
+
+            @raise KeyError: if the vertex is not in the graph
+        """
+        i = self.idOf(vertex)
+        if i is None:
+            raise KeyError(vertex)
+        degree = self._newIn.get(i, 0)
+        if i < len(self.labels):
+            degree += int(self._baseInDegrees()[i])
+        return degree
+
+    ''' ========= graph add methods ========='''
+    def addVertex(self, vertex):
+        """ Add a vertex to the graph.
+            If vertex is already in graph it doeas nothing
+
+            @type vertex: vertex
+            @param vertex: vertex to add
+        """
+        if self._triangleIndex is not None:
+            self._triangleIndex.addVertex(vertex)
+        if self.idOf(vertex) is None:
+            self._labelIndex()[vertex] = self.numOfVertices()
+            self._newLabels.append(vertex)
+            self._version += 1
+
+    def addEdge(self, vertex1, vertex2):
+        """ Add an edge to the graph between the pair "vertex1-vertex2".
+            Edges are buffered and merged into the arrays on the next read
+            of the arrays, so adding many edges in a row is cheap; the
+            counters of edges and degrees include them without merging.
+            If the edge is already in the graph it does nothing.
+
+            @type vertex1: vertex
+            @param vertex1 -- vertex of the graph
+            @type vertex2: vertex
+            @param vertex2 -- vertex of the graph
+        """
+        if self._triangleIndex is not None:
+            self._triangleIndex.addEdge(vertex1, vertex2)
+        i = self.idOf(vertex1)
+        j = self.idOf(vertex2)
+        if i is not None and j is not None and not self._hasEdge(i, j):
+            self._newSrc.append(i)
+            self._newDst.append(j)
+            self._newEdges.add((i, j))
+            self._newOut[i] = self._newOut.get(i, 0) + 1
+            self._newIn[j] = self._newIn.get(j, 0) + 1
+            self._version += 1
+
+
+if __name__ == "__main__":
+
+    g = {"a" : ["b", "c"],
+         "b" : ["c"],
+         "c" : []
+    }
+
+    graph = CompactDirectedGraph(graphDict=g)
+    print "--> Graph"
+    print graph
+
+    print "--> number of vertices:"
+    print graph.numOfVertices()
+
+    print "--> number of edges:"
+    print graph.numOfEdges()
+
+    print "--> adding vertex z"
+    graph.addVertex("z")
+    graph.addEdge("a","z")
+    graph.addEdge("z","a")
+
+    print "--> Graph"
+    print graph
+
+    print "--> CSR arrays"
+    print graph.csr()
+
+    ''' ====== TEST IMPORT ===== '''
+    wikivote = CompactDirectedGraph(filename = "./../data/Wiki_Vote.txt")
+    print "--> Wiki-Vote vertices and edges"
+    print wikivote.numOfVertices(), wikivote.numOfEdges()
@@ -6,7 +6,6 @@
 # Author: Emanuele Pesce
 #----------------------------------------------------------------------
 import NaiveDirectedGraph as ng
-import sys
 
 class DirectedNetworkAnalyzer(ng.NaiveDirectedGraph):
     """ Director Network analyzer class which contains methods for analyzing a 
@@ -15,18 +14,47 @@ class DirectedNetworkAnalyzer(ng.NaiveDirectedGraph):
     """
 
     '''========= constructor ========='''
-    def __init__(self, filename = "", graphDict={}):
+    def __init__(self, filename = "", graphDict={}, cache=False, reverseIndex=False,
+                 cacheSize=16, persist=False):
         """ Constructor
                     
             @type filename: string
             @param filename: name of the file
             @type graphDict: graph dictionary
             @param graphDict: graph 
+            @type cache: boolean
+            @param cache: if True the file is loaded through its binary cache
+                          (memory-mapped, see GraphCache) into a compact
+                          graph, whose node labels are integers
+            @type reverseIndex: boolean
+            @param reverseIndex: if True the reverse index (in-neighbors of
+                                 each vertex) is built while loading the graph
+            @type cacheSize: integer
+            @param cacheSize: max number of centrality results kept (see
+                              centrality)
+            @type persist: boolean
+            @param persist: if True the centrality results of the graph read
+                            from filename are saved next to it and reused by
+                            later runs (see CentralityCache)
         """
-        if len(filename) > 0:
-            self.graphDict = self.readGraph(filename)
+        import CentralityCache as cc
+        if len(filename) > 0 and cache:
+            import CompactDirectedGraph as cg
+            compact = cg.CompactDirectedGraph(filename=filename, cache=True,
+                                              reverseIndex=reverseIndex)
+            self.header = compact.header
+            self.setGraph(compact.getGraph())
+        elif len(filename) > 0 and reverseIndex:
+            graph, reverse = self.readGraph(filename, reverse=True)
+            self.setGraph(graph, reverse)
+        elif len(filename) > 0:
+            self.setGraph(self.readGraph(filename))
         else:
-            self.graphDict = graphDict
+            self.setGraph(graphDict)
+            if reverseIndex:
+                self.getReverseGraph()
+        self.centralityCache = cc.CentralityCache(cacheSize, filename if persist else "",
+                                                  self.version(), "cache" if cache else "")
      
     def getGraph(self):
       """ Return the graph dictionary 
@@ -38,338 +66,285 @@ class DirectedNetworkAnalyzer(ng.NaiveDirectedGraph):
   
   
     def diameter(self, graph={}):
-      """ Return the largest shortest path and the number of nodes and edges of the largest component
+      """ Return the number of nodes and edges of the largest (weakly)
+          connected component and the largest shortest path, computed on
+          the CSR arrays of the graph (see GraphTraversal): one component
+          labeling pass and the exact diameter with few searches
+
+          @type graph: graph
+          @param graph: a graph in a dictionary structure (default: this one)
+
+          @rtype: tuple
+          @return: nodes, edges (stored edges / 2) and diameter
       """
-      if len(graph)<1:
-        graph = self.graph
-      nodes = 0
-      edges = 0
-      diameter = 0
-      
-      for i in graph.keys():
-        ''' inizialize variables in each iteration'''
-        visited = []
-        max_distance = 0
-        tmp_edge = 0
-        queue = [i]
-        distance = dict()
-        for j in graph.keys():
-          distance[j] = -1
-        distance[i] = 0
-        ''' BFS for counting the number of edges and nodes and for calculating diameter '''
-        while queue != []:
-          s = queue.pop(0)
-          visited.append(s)
-          tmp_edge += len(graph[s])
-          for j in graph[s]:
-            if distance[j] < 0: #not visited
-              queue.append(j)
-              distance[j] = distance[s] + 1
-              if distance[j] > max_distance:
-                max_distance = distance[j]
-        ''' save only information about the largest component '''
-        if len(visited) > nodes:
-          nodes = len(visited)
-          edges = tmp_edge/2
-        '''  save max diameter '''
-        if max_distance > diameter:
-          diameter = max_distance
-          
-      return nodes,edges,diameter
+      import CompactDirectedGraph as cg
+      import GraphTraversal as gt
+      if len(graph) < 1:
+        compact = self.toCompact()
+      else:
+        compact = cg.CompactDirectedGraph(graphDict=graph)
+      indptr, indices = compact.csr()
+      nodes, edges, labels = gt.largestComponent(indptr, indices)
+      return nodes, edges, gt.diameter(compact)
 
 
-    def counterUtility(self, graph ={}):
+    def counterUtility(self, graph ={}, processes=None):
       """  Return the number of edges, the number of triangles, length-2 paths and the average clustering
+           of the undirected graph underlying the graph, from one count of
+           the triangles (see Triangles.clusteringStats)
+           
+           @type graph: graph
+           @param graph: a graph in a dictionary structure (default: this one)
+           @type processes: integer
+           @param processes: number of processes (default: the number of cores)
       """
-      if len(graph)<1:
-        graph = self.graph
-      edges=0
-      triangles = 0
-      paths = 0
-      total=0
-      
-      for i in graph.keys():
-        edges += len(graph[i])
-        neigh_pairs = (len(graph[i])*(len(graph[i])-1))/2
-        closed_pairs = 0
-        for j in graph[i]:
-          for k in graph[j]:
-            if k != i:
-              paths += 1
-            if k in graph[i]:
-              closed_pairs += 1
-        triangles += closed_pairs
-        if neigh_pairs > 0:
-          total += float(closed_pairs)/(2*neigh_pairs)
-          
-      return int(edges/2), int(triangles/6), int(paths/2), float(total)/len(graph)
+      import CompactDirectedGraph as cg
+      import Triangles as tr
+      if len(graph) < 1 and self._triangleIndex is not None:
+        index = self._triangleIndex # kept up to date by addEdge
+        return index.numEdges, index.numTriangles, index.wedges, index.averageClustering()
+      if len(graph) < 1:
+        compact = self.toCompact()
+      else:
+        compact = cg.CompactDirectedGraph(graphDict=graph)
+      triangles, clustering, transitivity, paths, edges = tr.clusteringStats(compact, processes)
+      if len(clustering) == 0:
+        return 0, 0, 0, 0.0
+      return edges, int(triangles.sum() // 3), paths, float(clustering.mean())
     
     ''' ============== Generic analysis methods ============== '''
-    def averageClustering(self):
+    def averageClustering(self, processes=None):
         """
             Return the average clustering of the graph           
-            (Clustering index of a node is the number of his neghbors that are
-            connected among themselves)
-        """
-        total = 0
-        for i in self.graphDict:
-            ''' calculate the number of the pairs of neighbors of node i which are adiacents '''
-            neighs = len(self.graphDict[i])
-            pairsNeigh = ( neighs * (neighs-1) )/2 # all pairs
-            ''' check how many nehgbors of node i have a connection '''
-            triangles = 0
-            for j in self.graphDict[i]:
-                for k in self.graphDict[i]:
-                    if k in self.graphDict[j]:
-                        triangles += 1
-                if pairsNeigh > 0:
-                    total += float(triangles)/pairsNeigh
+            (Clustering index of a node is the fraction of the ordered pairs
+            of his out-neighbors which are connected by an edge, see
+            Triangles.directedClustering)
             
-        return float(total)/self.numOfVertices()
+            @type processes: integer
+            @param processes: number of processes (default: the number of cores)
+        """
+        import Triangles as tr
+        clustering = tr.directedClustering(self.toCompact(), processes)
+        if len(clustering) == 0:
+            return 0.0
+        return float(clustering.mean())
     
     
-    def averageClusteringUndirected(self):
+    def averageClusteringUndirected(self, processes=None):
         """
             Return the average clustering of the graph           
             (Clustering index of a node is the number of his neghbors that are
-            connected among themselves)
+            connected among themselves, in the undirected graph; the
+            triangles are counted with the forward algorithm, see
+            Triangles.clusteringStats, or read from the triangle index if
+            it is kept, see triangleIndex)
+            
+            @type processes: integer
+            @param processes: number of processes (default: the number of cores)
         """
-        graph = self.getGraph()
-        dirGraph = {}
-        
-        for i in graph.keys():
-            dirGraph[i] = set()
-        for i in graph.keys():
-            for j in graph[i]:
-                dirGraph[i].add(j)
-                dirGraph[j].add(i)
-                        
-        total = 0       
-        for i in dirGraph:
-            ''' calculate the number of the pairs of neighbors of node i 
-                which are adiacents
-            '''        
-            neighs = len(dirGraph[i])
-            pairsNeigh = ( neighs * (neighs-1) )/2 # all pairs
-            ''' check how many nehgbors of node i have a connection '''
-            triangles = 0
-            for j in dirGraph[i]:
-                for k in dirGraph[i]:
-                    if k in dirGraph[j]:
-                        triangles += 1
-            if pairsNeigh > 0:
-                total += float(triangles)/(2*pairsNeigh)
-        return float(total)/len(dirGraph)  
+        import Triangles as tr
+        if self._triangleIndex is not None:
+            return self._triangleIndex.averageClustering()
+        clustering = tr.clusteringStats(self.toCompact(), processes)[1]
+        if len(clustering) == 0:
+            return 0.0
+        return float(clustering.mean())
+    
+    def sampledClustering(self, samples=None, epsilon=None, confidence=0.95, rng=None):
+        """
+            Estimate the average clustering and the transitivity of the
+            undirected graph by wedge sampling (see
+            Triangles.sampledClustering): the cost depends on the number of
+            samples, not on the size of the graph
+            
+            @type samples: integer
+            @param samples: number of wedges sampled for each estimate
+            @type epsilon: real
+            @param epsilon: half width of the confidence intervals
+                            (default: 0.01 if samples is not given)
+            @type confidence: real
+            @param confidence: confidence level of the intervals
+            @type rng: RandomState
+            @param rng: random generator
+            
+            @rtype: tuple
+            @return: average clustering, transitivity and the half width of
+                     their confidence intervals
+        """
+        import Triangles as tr
+        return tr.sampledClustering(self.toCompact(), samples, epsilon, confidence, rng)
     
     ''' ============== Centralities measures ============== '''
-    def betweenness(self):
+    def betweenness(self, processes=None, samples=None, seconds=None, epsilon=None,
+                    k=None, confidence=0.95, rng=None):
       """ Compute betweenness centrality for each node of the graph
           
-          Girman-Newman algorithm 
+          Girman-Newman algorithm, computed with Brandes accumulation on the
+          CSR arrays of the graph with the sources split across a pool of
+          processes (see Betweenness.betweenness).
+          With a budget (samples, seconds or epsilon) the centrality is
+          estimated from a sample of pivot sources instead (see
+          Betweenness.sampledBetweenness): the half width of the confidence
+          interval of each node and the details of the sample are then kept
+          in self.betweennessBounds (None for the exact centrality)
+
+          @type processes: integer
+          @param processes: number of processes (default: the number of
+                            cores), 1 to compute in this process
+          @type samples: integer
+          @param samples: max number of pivots of the estimate
+          @type seconds: real
+          @param seconds: max time of the estimate
+          @type epsilon: real
+          @param epsilon: relative accuracy at which the estimate stops
+          @type k: integer
+          @param k: size of the top set the accuracy refers to
+          @type confidence: real
+          @param confidence: confidence level of the intervals
+          @type rng: RandomState
+          @param rng: random generator of the pivots
       """
-      ''' inizialize graph '''
-      graph = self.getGraph()
-      
-      ''' betweenness of each node is 0  '''
-      betweenness = {}
-      for i in graph.keys():
-        betweenness[i] = 0
-      
-      for s in graph.keys():
-        ''' Initialization for any root '''
-        #BFS tree
-        tree = []
-        
-        #queue for bfs
-        queue = [s]
-        
-        #parents
-        parents = {}
-        for i in graph.keys():
-          parents[i] = []
-        
-        #number of parents for calculate the amount of flow
-        spnum = {}
-        for i in graph.keys():
-          spnum[i] = 0
-          
-        spnum[s] = 1
-        
-        #distances from s
-        distance = {}
-        for i in graph.keys():
-          distance[i] = -1
-          
-        distance[s] = 0
-        
-        #flow
-        flow = {}
-        for i in graph.keys():
-          flow[i] = 0
-          
-        ''' BFS ''' 
-        while queue != []:
-          c = queue.pop(0)
-          tree.append(c)
-          for i in graph[c]:
-            if distance[i] == -1:
-              queue.append(i)
-              distance[i] = distance[c] + 1
-            if distance[i] == distance[c] + 1:
-              spnum[i] += spnum[c]
-              parents[i].append(c)
-            
-        ''' BOTTOM-UP PHASE ''' 
-        while tree != []:
-          c = tree.pop()
-          for i in parents[c]:
-            flow[i] += (float(spnum[i])/spnum[c])*(1 + flow[c])
-          if c != s:
-            betweenness[c] += flow[c]
-    
-      return betweenness
+      import Betweenness as bc
+      compact = self.toCompact()
+      labels = compact.labels.tolist()
+      if samples is None and seconds is None and epsilon is None:
+          scores = bc.betweenness(compact, processes)
+          self.betweennessBounds = None
+          return dict(zip(labels, scores.tolist()))
+      scores, halfWidth, info = bc.sampledBetweenness(compact, samples, seconds, epsilon, k,
+                                                      confidence, rng)
+      info["halfWidth"] = dict(zip(labels, halfWidth.tolist()))
+      self.betweennessBounds = info
+      return dict(zip(labels, scores.tolist()))
 
 
-    def eigenvector(self, confidence=0.01):
+    def eigenvector(self, confidence=0.01, max_iter=1000, start=None):
       """ Compute eigenvector centrality for each node of the graph
           
-          Method: left dominant eigenvector
+          Method: dominant eigenvector, by power iteration of x + A x with
+          sparse products over the CSR arrays (see Centrality.eigenvector).
+          The number of iterations and the residual are kept in
+          self.eigenvectorInfo
           
           @type confidence: number
-          @param  confidence: trueshold for convergence
+          @param  confidence: trueshold for convergence: max change of the
+                              centrality of a node (the highest is 1)
+          @type max_iter: integer
+          @param max_iter: max number of iterations
+          @type start: dictionary
+          @param start: centrality to start from (e.g. a previous result)
       """
-      graph = self.getGraph()
-      
-      nodes = graph.keys()
-      done = 0
-      
-      ''' Inizialization '''
-      eigen = {}
-      for i in nodes:
-        eigen[i] = 1/float(len(nodes))
-      
-      # first compute this temporary value for eigenvector centrality. The real value consists of a normalization of this temporary value
-      tmp = {}
-      ''' Repeat the process until the centrality vector does not change anymore'''
-      while not done: 
-        max_tmp = 0
-        for i in nodes:
-          tmp[i] = eigen[i] # Even if this is not standard, this is necessary in order that the algorithm converge for any graph
-          for j in graph[i]:
-            tmp[i] += eigen[j]        
-          if tmp[i] > max_tmp:
-            max_tmp = tmp[i]
-            
-        diff = 0
-        for i in nodes:
-          diff += abs(eigen[i]-float(tmp[i])/float(max_tmp)) # Distance between old and new centrality vector
-          eigen[i] = float(tmp[i])/max_tmp
-        
-        if diff < confidence:
-          done = 1
-          
-      return eigen
+      import Centrality as ce
+      compact = self.toCompact()
+      labels = compact.labels.tolist()
+      if start is not None:
+          start = [start.get(v, 0.0) for v in labels]
+      eigen, iterations, residual = ce.eigenvector(compact, confidence, max_iter, start)
+      self.eigenvectorInfo = {"iterations": iterations, "residual": float(residual)}
+      return dict(zip(labels, eigen.tolist()))
 
 
-    def katz(self, alpha = 0.125, confidence = 1.0e-6, max_iter = 1000):
+    def katz(self, alpha = 0.125, confidence = 1.0e-6, max_iter = 1000, direction = "out"):
         """ Computes katz centrality
-            K(u) = sum_(n in neighbors(u)) ( k(n)+1)            
+            K(u) = alpha * sum_(n in neighbors(u)) ( k(n)+1)
+            
+            Computed as a series with sparse products over the CSR arrays
+            (see Centrality.katz), for one or more alpha at once. The number
+            of iterations and whether each series converged (it diverges if
+            alpha is not below the inverse of the largest eigenvalue) are
+            kept in self.katzInfo
             
-            @type alpha: real
-            @param alpha: attenuation factor
+            @type alpha: real or list
+            @param alpha: attenuation factor(s)
             @type confidence: real
-            @param  confidence: trueshold for convergence
+            @param  confidence: trueshold for convergence (max change
+                                relative to the highest centrality)
             @type max_iter: integer
             @param max_iter: max number of iterations
+            @type direction: string
+            @param direction: "out": neighbors are the outgoing edges, "in":
+                              neighbors are the incoming edges
             
-            Note: this centrality is implemented considering outgoing edges.
+            @rtype: dictionary or list
+            @return: the centrality of each node, normalized by the highest
+                     (a list of them if alpha is a list)
         """
-        katz = dict()
-        tmp = dict()
-        graph = graph = self.getGraph() 
-        max_value = sys.float_info.min
-        
-        ''' inizialization '''
-        for i in graph.keys():
-            katz[i] = 0
-        
-        ''' computes katz centrality '''
-        while max_iter > 0:
-            for v in graph.keys():
-                tmp[v] = 0
-                for nbr in graph[v]:
-                    tmp[v] = tmp[v] + katz[nbr] + 1
-                tmp[v] = alpha*tmp[v]
-                if tmp[v] > max_value:
-                    max_value = tmp[v]
-                
-            diff = 0
-            for v in katz.keys():
-      		    diff = diff + abs(katz[v] - float(tmp[v])/max_value)	
-      		    katz[v] = float(tmp[v])/max_value
-            if diff < confidence:
-      		    return katz
-            max_iter -= 1
-        return katz
+        import Centrality as ce
+        compact = self.toCompact()
+        labels = compact.labels.tolist()
+        scores, iterations, converged = ce.katz(compact, alpha, confidence, max_iter, direction)
+        self.katzInfo = {"iterations": iterations, "converged": converged.tolist()}
+        if scores.ndim == 1:
+            return dict(zip(labels, scores.tolist()))
+        return [dict(zip(labels, column)) for column in scores.T.tolist()]
 
 
     def katzTrue(self, alpha = 0.125, confidence = 1.0e-6, max_iter = 1000):
-        """ Computes katz centrality
-            K(u) = sum_(n in neighbors(u)) ( k(n)+1)            
+        """ Computes katz centrality over the incoming edges
+            K(u) = alpha * sum_(n in in-neighbors(u)) ( k(n)+1)
             
-            @type alpha: real
-            @param alpha: attenuation factor
+            @type alpha: real or list
+            @param alpha: attenuation factor(s)
             @type confidence: real
             @param  confidence: trueshold for convergence
             @type max_iter: integer
             @param max_iter: max number of iterations
-      """
-        graph = self.getGraph()        
-        nodes = graph.keys()
-        
-        ''' Inizialization '''
-        katz = {}
-        last = {}
-        for i in nodes:
-            katz[i] = 1
-        
-        ''' computes katz centrality '''
-        done = 0
-        mi = 0
-        while mi <= max_iter or done == 0:
-            last = katz
-            max_value = 0
-            for i in nodes:
-                katz[i] = 0
-            ''' computes new katz centralities'''
-            for v in nodes: #for each node v
-                for nbr in graph[v]: #for each neighbour of v
-                    katz[nbr] += last[v] + 1 # node v spreads his centrality 
-                                             # to his neighbors
-            ''' attenuation and normalization'''
-            for i in nodes:
-                katz[i] = katz[i]*alpha
-                if katz[i] > max_value:
-                    max_value = katz[i]
-            for i in nodes:
-                katz[i] = float(katz[i])/max_value
-            ''' check confidence '''
-            diff = 0
-            for v in katz.keys():
-                diff += abs(katz[v]-last[v])
-            if diff < confidence:
-                done = 1
-            mi += 1
+        """
+        return self.katz(alpha, confidence, max_iter, direction = "in")
 
-        # return 
-        return katz
+
+    def centrality(self, centrality = "e", **params):
+      """ Return a centrality measure of each node, from the cache of the
+          results if it was already computed with the same parameters on
+          the current version of the graph (see CentralityCache). The
+          details of the computation (self.betweennessBounds,
+          self.eigenvectorInfo or self.katzInfo) are cached along with the
+          result and restored on a hit. Sampled betweenness (with samples,
+          seconds or epsilon) is a random estimate: it is computed on each
+          call and never cached.
+          
+          @type centrality: char
+          @param centrality: centrality measure:
+                             'b': betweenness
+                             'e': left dominant eigenvector
+                             'k': katz centrality
+          @param params: parameters of the measure (see betweenness,
+                         eigenvector and katz)
+          
+          @rtype: dictionary
+          @return: the centrality of each node
+      """
+      measures = {"b": self.betweenness, "e": self.eigenvector, "k": self.katz}
+      details = {"b": "betweennessBounds", "e": "eigenvectorInfo", "k": "katzInfo"}
+      if centrality not in measures:
+          raise ValueError("unknown centrality: %s" % centrality)
+      if centrality == "b" and any(params.get(budget) is not None
+                                   for budget in ("samples", "seconds", "epsilon")):
+          return self.betweenness(**params)
+      version = self.version()
+      entry = self.centralityCache.get(centrality, params, version)
+      if entry is None:
+          centers = measures[centrality](**params)
+          info = getattr(self, details[centrality])
+          self.centralityCache.put(centrality, params, version, centers, info)
+      else:
+          centers, info = entry
+          setattr(self, details[centrality], info)
+      return centers
         
         
     def topCenters(self, k=1, centrality = "e", confidence = 0.01, alpha=0.125,
-        max_iter=1000):
-      """ Return the k nodes with highest centrality 
+        max_iter=1000, samples=None, seconds=None, epsilon=None):
+      """ Return the k nodes with highest centrality, ranked from the
+          highest (ties are broken by the smallest node label). The nodes
+          are selected with a partition of the centrality array (see
+          Centrality.topIndices), and a list of k values is served from a
+          single selection. The centrality is computed once for each set of
+          parameters and version of the graph, except the sampled
+          betweenness (see centrality).
           
-          @type k: integer
+          @type k: integer or list
+          @param k: number of nodes, or a list of them
           @type centrality: char
           @param centrality: centrality measure to select. 
                              centrality values available:
@@ -378,31 +353,80 @@ class DirectedNetworkAnalyzer(ng.NaiveDirectedGraph):
                              'k': katz centrality
           @type confidence: real
           @param confidence: confidence value
+          @type alpha: real or list
+          @param alpha: katz only, attenuation factor(s) (see katz)
+          @type samples: integer
+          @param samples: betweenness only, max number of pivots of the
+                          estimate (see betweenness)
+          @type seconds: real
+          @param seconds: betweenness only, max time of the estimate
+          @type epsilon: real
+          @param epsilon: betweenness only, relative accuracy of the top k
+                          nodes at which the estimate stops; if the top k
+                          set is certain at the confidence level of the
+                          intervals, self.betweennessBounds["separated"]
+                          is True
           
+          @rtype: tuple or list
+          @return: the list of the top nodes and the list of their
+                   centrality (a list of such tuples if k is a list, and a
+                   list of such results, one per alpha, if alpha is a list)
+          @raise ValueError: if k is an empty list or a number is not positive
       """
-      if centrality == "b":
-          centers = self.betweenness()
+      ks = self._topSizes(k)
+      if centrality == "b" and (samples, seconds, epsilon) == (None, None, None):
+          centers = self.centrality("b") # exact: the same result for any k
+      elif centrality == "b":
+          centers = self.centrality("b", samples=samples, seconds=seconds, epsilon=epsilon,
+                                    k=max(ks))
       elif centrality == "e":
-          centers = self.eigenvector(float(confidence))
-      elif centrality == "k":
-          centers = self.katz(alpha = alpha, confidence = confidence, max_iter = max_iter)
-            
-      top = []
-      top_values = []
-      for i in centers.keys():
-        added = 0
-        for j in range(min(len(top),int(k))):
-          if centers[top[j]] < centers[i]:
-            top.insert(j,i)
-            added = 1
-            break
-        if added == 0:
-          top.append(i)
-        if len(top) > int(k):
-          top.pop()
-      for i in range(len(top)):
-        top_values.append(centers[top[i]])
-      return top, top_values
+          centers = self.centrality("e", confidence=float(confidence))
+      else:
+          centers = self.centrality(centrality, alpha=alpha, confidence=confidence,
+                                    max_iter=max_iter)
+      if isinstance(centers, list): # katz with a list of alpha
+          return [self.rankCenters(c, k) for c in centers]
+      return self.rankCenters(centers, k)
+
+
+    def _topSizes(self, k):
+      """ Return the list of the numbers of top nodes requested by k
+
+          @raise ValueError: if k is an empty list or a number is not positive
+      """
+      ks = [int(i) for i in k] if isinstance(k, (list, tuple)) else [int(k)]
+      if len(ks) == 0:
+          raise ValueError("k must be a positive integer or a non empty list of them")
+      if min(ks) <= 0:
+          raise ValueError("k must be positive: %s" % (k,))
+      return ks
+
+
+    def rankCenters(self, centers, k):
+      """ Return the k nodes with highest centrality, ranked from the
+          highest (ties are broken by the smallest node label), see
+          topCenters
+          
+          @type centers: dictionary
+          @param centers: the centrality of each node
+          @type k: integer or list
+          @param k: number of nodes, or a list of them
+          
+          @rtype: tuple or list
+          @return: the list of the top nodes and the list of their
+                   centrality (a list of such tuples if k is a list)
+      """
+      import Centrality as ce
+      ks = self._topSizes(k)
+      nodes = centers.keys()
+      values = centers.values()
+      ranked = ce.topIndices(values, max(ks), keys=nodes)
+      top = [nodes[i] for i in ranked]
+      top_values = [values[i] for i in ranked]
+      slices = [(top[:i], top_values[:i]) for i in ks]
+      if isinstance(k, (list, tuple)):
+          return slices
+      return slices[0]
 
 
    
@@ -422,7 +446,12 @@ if __name__ == "__main__":
     print an.topCenters(15, 'k', confidence=1.0e-6)
     print "Top centers betweenneess"
     print an.topCenters(15, 'b')
+    print "Top centers betweenneess, sampled"
+    print an.topCenters(15, 'b', epsilon=0.1)
+    print an.betweennessBounds["samples"], an.betweennessBounds["separated"]
 
     print "Average clustering"
     print an.averageClusteringUndirected()
+    print "Average clustering, transitivity, half width (sampled)"
+    print an.sampledClustering()
     
\ No newline at end of file
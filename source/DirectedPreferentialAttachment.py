@@ -6,9 +6,250 @@
 # Author: Emanuele Pesce
 #----------------------------------------------------------------------
 import NaiveDirectedGraph as dg
+import CompactDirectedGraph as cg
+import EdgeListIO as io
 import random
 import numpy as np
 
+class FenwickTree:
+    """ Fenwick (binary indexed) tree over non negative weights: weights are
+        updated and positions are sampled proportionally to their weight in
+        O(log n), both operations are vectorized over arrays of positions.
+    """
+
+    def __init__(self, weights):
+        """ Constructor
+
+            @type weights: array
+            @param weights: initial weight of each position
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        self.n = len(weights)
+        prefix = np.concatenate(([0.0], np.cumsum(weights)))
+        i = np.arange(1, self.n + 1)
+        self.step = 1
+        while self.step*2 <= self.n:
+            self.step *= 2
+        # padded to a power of two with infinite weights, never sampled
+        self.tree = np.full(2*self.step + 1, np.inf)
+        self.tree[0] = 0.0
+        self.tree[1:self.n + 1] = prefix[i] - prefix[i - (i & -i)]
+
+    def add(self, positions, deltas):
+        """ Add deltas to the weights of positions
+
+            @type positions: array
+            @param positions: positions in [0, n)
+            @type deltas: array
+            @param deltas: weight to add to each position
+        """
+        i = np.asarray(positions, dtype=np.int64) + 1
+        deltas = np.asarray(deltas, dtype=np.float64)
+        while len(i) > 0:
+            np.add.at(self.tree, i, deltas) # positions can share a parent
+            i = i + (i & -i)
+            inside = i <= self.n
+            i = i[inside]
+            deltas = deltas[inside]
+
+    def total(self):
+        """ Return the sum of the weights """
+        total = 0.0
+        i = self.n
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def sample(self, values):
+        """ Return, for each value u in [0, total), the position whose
+            cumulative weight range contains u; with uniform values the
+            positions are drawn proportionally to their weight.
+
+            @type values: array
+            @param values: values in [0, total)
+
+            @rtype: array
+            @return: positions
+        """
+        values = np.array(values, dtype=np.float64)
+        pos = np.zeros(len(values), dtype=np.int64)
+        step = self.step
+        while step > 0:
+            weight = self.tree[pos + step]
+            move = weight <= values
+            values -= np.where(move, weight, 0.0)
+            pos += step*move
+            step //= 2
+        return np.minimum(pos, self.n - 1)
+
+
+def iterAttachmentEdges(n, d, p, rng=np.random, batchSize=2**20, distinct=True):
+    """ Yield the out-links of a preferential attachment graph (see the
+        class DirectedPreferentialAttachment) in batches of whole nodes,
+        drawn at once. The popular targets are kept in a pool (one entry
+        per in-link): a copy of a pool entry created in the same batch is a
+        pointer to it, pointers are resolved by pointer jumping.
+        Any earlier in-link can be copied, so the pool keeps them all: it
+        grows (by doubling) as the nodes arrive, up to one compact id per
+        in-link (O(n d)) at the end. Only the edges are streamed.
+
+        @type n: integer
+        @param n: number of nodes
+        @type d: integer
+        @param d: max out-degree
+        @type p: real[0,1]
+        @param p: probability to choose a target uniformly at random
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: approximate number of out-links drawn at a time
+        @type distinct: boolean
+        @param distinct: if True the repeated out-links are dropped and each
+                         batch is sorted by source, otherwise the out-links
+                         are in order of creation
+
+        @rtype: generator
+        @return: pairs of arrays (sources, destinations)
+    """
+    total = n*d
+    step = max(batchSize // max(d, 1), 1)*d
+    pool = np.empty(min(total, step), dtype=cg.indexType(n))
+    size = 0 # entries of the pool
+    for start in range(0, total, step):
+        trials = np.arange(start, min(start + step, total))
+        source = trials // d
+        uniform = rng.random_sample(len(trials)) < p
+        target = rng.randint(0, n, size=len(trials))
+
+        ''' out-links which add an entry to the pool '''
+        creates = uniform & (target != source)
+        if size == 0: # a copy needs a non empty pool
+            first = np.argmax(creates) if creates.any() else len(trials)
+            creates |= ~uniform & (np.arange(len(trials)) > first)
+        else:
+            creates |= ~uniform
+        trials = np.flatnonzero(creates)
+        uniform = uniform[trials]
+        entry = size + np.arange(len(trials))
+
+        ''' copies: entries of the previous batches are read, the others are
+            pointers to resolve '''
+        value = target[trials].astype(np.int64)
+        copy = np.flatnonzero(~uniform)
+        parent = (rng.random_sample(len(copy))*entry[copy]).astype(np.int64)
+        old = parent < size
+        value[copy[old]] = pool[parent[old]]
+        pointer = np.arange(len(trials))
+        pointer[copy[~old]] = parent[~old] - size
+        value[copy[~old]] = -1
+        pending = copy[~old]
+        while len(pending) > 0:
+            value[pending] = value[pointer[pending]]
+            pointer[pending] = pointer[pointer[pending]]
+            pending = pending[value[pending] < 0]
+
+        if size + len(trials) > len(pool):
+            grown = np.empty(min(max(2*len(pool), size + len(trials)), total), dtype=pool.dtype)
+            grown[:size] = pool[:size]
+            pool = grown
+        pool[size:size + len(trials)] = value
+        size += len(trials)
+        if distinct:
+            codes = np.unique(source[trials]*n + value)
+            yield codes // n, codes % n
+        else:
+            yield source[trials], value
+
+
+def attachmentEdges(n, d, p, rng=np.random, batchSize=2**20):
+    """ Generate the out-links of a preferential attachment graph (see
+        iterAttachmentEdges)
+
+        @type n: integer
+        @param n: number of nodes
+        @type d: integer
+        @param d: max out-degree
+        @type p: real[0,1]
+        @param p: probability to choose a target uniformly at random
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: approximate number of out-links drawn at a time
+
+        @rtype: tuple
+        @return: arrays src and dst of the out-links, in order of creation
+                 (with repetitions)
+    """
+    batches = list(iterAttachmentEdges(n, d, p, rng, batchSize, distinct=False))
+    if len(batches) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate([b[0] for b in batches]), np.concatenate([b[1] for b in batches])
+
+
+def kernelEdges(n, d, p, kernel, fitness=None, rng=np.random, batchNodes=1):
+    """ Generate the out-links of a preferential attachment graph whose
+        popular targets are drawn with probability proportional to
+        kernel(in-degree) * fitness, with a Fenwick tree (see FenwickTree).
+        The out-links of the arriving nodes are drawn together and the
+        weights are updated after them, so with one node at a time (the
+        default) each node sees the in-degrees left by the previous ones.
+
+        @type n: integer
+        @param n: number of nodes
+        @type d: integer
+        @param d: max out-degree
+        @type p: real[0,1]
+        @param p: probability to choose a target uniformly at random
+        @type kernel: function
+        @param kernel: attachment kernel, maps an array of in-degrees to an
+                       array of weights (e.g. lambda k: (k + 1)**1.5)
+        @type fitness: array
+        @param fitness: fitness of each node (default: 1 for every node)
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchNodes: integer
+        @param batchNodes: number of nodes whose out-links are drawn before
+                           the weights are updated (more is faster, but the
+                           links of a batch do not see each other)
+
+        @rtype: tuple
+        @return: arrays src and dst of the out-links, in order of creation
+                 (with repetitions)
+    """
+    fitness = np.ones(n) if fitness is None else np.asarray(fitness, dtype=np.float64)
+    indegree = np.zeros(n, dtype=np.int64)
+    tree = FenwickTree(kernel(indegree)*fitness)
+    total = n*d
+    step = max(int(batchNodes), 1)*d
+    src = []
+    dst = []
+    for start in range(0, total, step):
+        source = np.arange(start, min(start + step, total)) // d
+        uniform = rng.random_sample(len(source)) < p
+        target = rng.randint(0, n, size=len(source))
+        weight = tree.total()
+        popular = np.flatnonzero(~uniform)
+        if weight > 0:
+            target[popular] = tree.sample(rng.random_sample(len(popular))*weight)
+            keep = target != source
+        else:
+            keep = uniform & (target != source)
+        source = source[keep]
+        target = target[keep]
+        src.append(source)
+        dst.append(target)
+
+        ''' new weights of the targets '''
+        nodes, count = np.unique(target, return_counts=True)
+        before = kernel(indegree[nodes])*fitness[nodes]
+        indegree[nodes] += count
+        tree.add(nodes, kernel(indegree[nodes])*fitness[nodes] - before)
+    if len(src) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(src), np.concatenate(dst)
+
+
 class DirectedPreferentialAttachment(dg.NaiveDirectedGraph):
     """ Directed Prefential Attachment Graph class. Extends Naive Directed Graph class.
     In a Prefential Attachment Graph when a node j is created, its out-links are produced in the following way:
@@ -18,61 +259,102 @@ class DirectedPreferentialAttachment(dg.NaiveDirectedGraph):
     This is the idea behind the 'Rich get Richer' phenomen
     """
     
-    '''========= constructor ========='''    
-    def __init__(self, n, d, p, e_inf = 0, e_sup = 0):
+    '''========= constructor ========='''
+    def __init__(self, n, d, p, e_inf = 0, e_sup = 0, compact=False,
+                 kernel=None, fitness=None, rng=None):
         """ Constructor
-            
+
             @type n: integer
             @param n: number of nodes
             @type d: integer
             @param d: max out-degree
             @type p: real[0,1]
-            @param p: probability to have and edge between a pair of nodes             
+            @param p: probability to have and edge between a pair of nodes
+            @type compact: boolean
+            @param compact: if True the graph is generated directly in a
+                            CompactDirectedGraph (see
+                            genPrefAttachmentGraph_compact)
+            @type kernel: function
+            @param kernel: attachment kernel of the compact mode (see
+                           kernelEdges), None for the linear one
+            @type fitness: array
+            @param fitness: fitness of each node (used with kernel)
+            @type rng: RandomState
+            @param rng: random generator of the compact mode and of the
+                        default one (default: the global numpy one)
          """
         self.n = n
         self.d = d
         self.p = p
-        if e_sup > 0:
-            self.graphDict = self.genPrefAttachmentGraph_controlOrder(self.n,self.d,self.p, e_inf, e_sup)
+        if compact:
+            if rng is None:
+                rng = np.random
+            m = rng.randint(e_inf, e_sup + 1) if e_sup > 0 else None
+            self.setGraph(self.genPrefAttachmentGraph_compact(self.n, self.d, self.p, rng,
+                                                              kernel, fitness, m).getGraph())
+        elif e_sup > 0:
+            self.setGraph(self.genPrefAttachmentGraph_controlOrder(self.n,self.d,self.p, e_inf, e_sup))
         else:
-            self.graphDict = self.genPrefAttachmentGraph(self.n,self.d,self.p)
+            self.setGraph(self.genPrefAttachmentGraph(self.n,self.d,self.p, rng))
+
+
+    def genPrefAttachmentGraph(self,n,d,p, rng=None):
+        """ Generate a preferential attachment graph (see attachmentEdges).
 
-   
-    def genPrefAttachmentGraph(self,n,d,p):
-        """ Generate a preferential attachment graph.
-            
             @type n: integer
             @param n: number of nodes
             @type d: integer
             @param d: max out-degree
             @type p: real[0,1]
             @param p: probability to have and edge between a pair of nodes
-            
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
             @rtype: graph
             @return: a preferential attachment graph
         """
-        ''' inizialization '''
-        L = [] #each element is a vertex of the graph, the number of the times an element appear in L is the number of indegree(element)
-        graph={}
-        for i in range(n):
-            graph[i] = set()
-        ''' create edges for each node according with the prefential attachment rule '''
-        for i in range(n):
-            for j in range(d):
-                #with probability p create an edge outgoing from i
-                r = np.random.uniform()
-                if p > r:
-                    vToAdd =  random.randint(0,n-1)
-                    if vToAdd != i:
-                        graph[i].add(vToAdd) 
-                        L.append(vToAdd)                      
-                # with probability 1-p create an edge to a popular node
-                # the more indegree(vertex) is high, the more vertex is popular
-                elif len(L) > 0:                      
-                    vToAdd =  random.randint(0,len(L)-1) # probability proportional to a popularity of a node
-                    graph[i].add(L[vToAdd])
-                    L.append(L[vToAdd])
-        return graph
+        if rng is None:
+            rng = np.random
+        src, dst = attachmentEdges(n, d, p, rng)
+        return io.edgesToDict(np.arange(n), src, dst)
+
+    def genPrefAttachmentGraph_compact(self, n, d, p, rng=None, kernel=None,
+                                       fitness=None, m=None):
+        """ Generate a preferential attachment graph in a
+            CompactDirectedGraph, never building the dictionary structure.
+
+            @type n: integer
+            @param n: number of nodes
+            @type d: integer
+            @param d: max out-degree
+            @type p: real[0,1]
+            @param p: probability to have and edge between a pair of nodes
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+            @type kernel: function
+            @param kernel: attachment kernel (see kernelEdges), None for the
+                           linear one (see attachmentEdges)
+            @type fitness: array
+            @param fitness: fitness of each node (used with kernel)
+            @type m: integer
+            @param m: if given, only the first m distinct edges created are
+                      kept
+
+            @rtype: CompactDirectedGraph
+            @return: a preferential attachment graph
+        """
+        if rng is None:
+            rng = np.random
+        if kernel is None:
+            src, dst = attachmentEdges(n, d, p, rng)
+        else:
+            src, dst = kernelEdges(n, d, p, kernel, fitness, rng)
+        if m is not None:
+            ''' first occurrences, in order of creation '''
+            first = np.sort(np.unique(src*n + dst, return_index=True)[1])[:m]
+            src = src[first]
+            dst = dst[first]
+        return cg.CompactDirectedGraph(edges=(src, dst), labels=np.arange(n))
 
     def genPrefAttachmentGraph_controlOrder(self,n,d,p, e_inf, e_sup):
         """ Generate a preferential attachment graph with a limited number of 
@@ -96,7 +378,6 @@ class DirectedPreferentialAttachment(dg.NaiveDirectedGraph):
         L = [] #each element is a vertex of the graph, the number of the times an element appear in L is the number of indegree(element)
         graph={}
         n_edges = random.randint(e_inf, e_sup)
-        print n_edges
         ''' create edges for each node according with the prefential attachment rule '''
         graph[1] = set()
         for i in range(2, n):
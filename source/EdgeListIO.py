@@ -0,0 +1,270 @@
+#----------------------------------------------------------------------
+# EdgeListIO
+#
+# Contains functions for reading and writing graphs stored as edge lists
+# (one "u v" pair per line, "#" comment lines as in the SNAP datasets)
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import CompactDirectedGraph as cg
+import numpy as np
+import re
+
+SNAP_COUNTS = re.compile(r"Nodes:\s*(\d+)\s+Edges:\s*(\d+)")
+INTEGER_CHARS = b"0123456789-+ \t\r\n"
+SPACE_CHARS = b" \t\r\n"
+POWERS = 10**np.arange(1, 19, dtype=np.int64)
+
+def parseHeader(comments):
+    """ Parse the comment lines of an edge list file
+
+        @type comments: list
+        @param comments: comment lines (starting with "#")
+
+        @rtype: dictionary
+        @return: the comment lines ("comments") and, when the SNAP
+                 "# Nodes: n Edges: m" line is present, the declared number of
+                 nodes ("nodes") and edges ("edges"), otherwise None
+    """
+    header = {"comments": comments, "nodes": None, "edges": None}
+    for line in comments:
+        match = SNAP_COUNTS.search(line)
+        if match:
+            header["nodes"] = int(match.group(1))
+            header["edges"] = int(match.group(2))
+    return header
+
+
+def splitComments(text):
+    """ Remove the comment lines (lines containing "#", as a header line or
+        a note after an edge, which drops the whole line) from a block of
+        text. Comments are rare (usually a header), so each one is located
+        with find instead of scanning every line.
+
+        @type text: string
+        @param text: block of complete lines
+
+        @rtype: tuple
+        @return: the text without comments and the list of comment lines
+    """
+    comments = []
+    pieces = []
+    start = 0 # first character not yet copied
+    pos = text.find(b"#")
+    while pos >= 0:
+        begin = text.rfind(b"\n", 0, pos) + 1
+        end = text.find(b"\n", pos)
+        end = len(text) if end < 0 else end + 1
+        comments.append(text[begin:end].strip())
+        pieces.append(text[start:begin])
+        start = end
+        pos = text.find(b"#", end)
+    pieces.append(text[start:])
+    return b"".join(pieces), comments
+
+
+def isCanonical(text, tokens):
+    """ Return True if the integers parsed from a block of text are written
+        in it as str writes them (no "+" sign, no leading zeros, in the
+        int64 range), so that their labels are not changed by the parsing.
+        A token is never shorter than the integer it gives, so the lengths
+        are compared.
+
+        @type text: string
+        @param text: block of complete lines, made of integer characters
+        @type tokens: array
+        @param tokens: the integers parsed from text
+
+        @rtype: boolean
+        @return: True if every token is written back unchanged
+    """
+    info = np.iinfo(np.int64)
+    if len(tokens) > 0 and (tokens.max() == info.max or tokens.min() == info.min):
+        return False # out of range values are clamped by the parser
+    negative = int((tokens < 0).sum())
+    digits = int(np.searchsorted(POWERS, np.abs(tokens), side="right").sum()) + len(tokens)
+    return text.count(b"-") == negative and \
+           digits + negative == len(text.translate(None, SPACE_CHARS))
+
+
+def readEdgeList(filename, chunkSize=2**22):
+    """ Read an edge list file in chunks and return it as arrays of node ids.
+        Lines containing "#" are comments (see splitComments).
+        Node labels are integers when every token of the file is an integer
+        written as str writes it (see isCanonical), strings otherwise, so
+        labels like "007" or "+5" are kept as they are.
+
+        @type filename: string
+        @param filename: name of the file containing the graph
+        @type chunkSize: integer
+        @param chunkSize: number of bytes parsed at a time
+
+        @rtype: tuple
+        @return: labels (label of each node id), src and dst (node ids of each
+                 edge) and the header dictionary (see parseHeader)
+    """
+    chunks = []
+    comments = []
+    numeric = True
+    tail = b""
+    infile = open(filename, "rb")
+    try:
+        while True:
+            block = infile.read(chunkSize)
+            if len(block) > 0:
+                block = tail + block
+                cut = block.rfind(b"\n") + 1
+                text, tail = block[:cut], block[cut:]
+            else:
+                text, tail = tail, b""
+            if b"#" in text:
+                text, lines = splitComments(text)
+                comments.extend(lines)
+            if numeric and len(text.translate(None, INTEGER_CHARS)) > 0:
+                numeric = False
+            if numeric:
+                tokens = np.fromstring(text, dtype=np.int64, sep=" ")
+                numeric = isCanonical(text, tokens)
+            if not numeric:
+                tokens = np.array(text.split())
+            if len(tokens) % 2 != 0:
+                raise ValueError("%s: malformed edge list" % filename)
+            chunks.append(tokens)
+            if len(block) == 0:
+                break
+    finally:
+        infile.close()
+
+    ''' intern all the labels in one vectorized pass '''
+    if not numeric:
+        chunks = [c.astype(str) if c.dtype.kind == "i" else c for c in chunks]
+    tokens = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    labels, ids = cg.internLabels(tokens)
+    return labels, ids[0::2], ids[1::2], parseHeader(comments)
+
+
+def edgesToDict(labels, src, dst):
+    """ Build the dictionary structure (vertex -> set of neighbors) of a graph
+        given as arrays of node ids
+
+        @type labels: array
+        @param labels: label of each node id
+        @type src: array of integers
+        @param src: source id of each edge
+        @type dst: array of integers
+        @param dst: destination id of each edge
+
+        @rtype: graph
+        @return: graph
+    """
+    indptr, indices = cg.buildCSR(len(labels), src, dst)
+    vertices = labels.tolist()
+    neighbors = labels[indices].tolist()
+    indptr = indptr.tolist()
+    graph = {}
+    for i in range(len(vertices)):
+        graph[vertices[i]] = set(neighbors[indptr[i]:indptr[i+1]])
+    return graph
+
+
+def iterEdges(graph, batchSize=2**16):
+    """ Yield the edges of a graph in batches, straight from its adjacency
+        structure (the whole edge list is never built)
+
+        @type graph: graph
+        @param graph: a graph in a dictionary structure, a NaiveDirectedGraph
+                      (or subclass) or a CompactDirectedGraph
+        @type batchSize: integer
+        @param batchSize: approximate number of edges of each batch
+
+        @rtype: generator
+        @return: pairs of sequences (sources, destinations) of vertices
+    """
+    if hasattr(graph, "getGraph"):
+        graph = graph.getGraph()
+    if isinstance(graph, cg.CompactGraphView):
+        ''' compact graph: slice the CSR arrays '''
+        graph = graph.graph
+        indptr, indices = graph.csr()
+        n = len(indptr) - 1
+        first = 0
+        while first < n:
+            # the nodes whose edges fit in a batch (at least one node)
+            last = int(np.searchsorted(indptr, indptr[first] + batchSize, side="right")) - 1
+            last = min(max(last, first + 1), n)
+            src = np.repeat(np.arange(first, last), np.diff(indptr[first:last+1]))
+            if len(src) > 0:
+                yield graph.labels[src], graph.labels[indices[indptr[first]:indptr[last]]]
+            first = last
+        return
+    src = []
+    dst = []
+    for vertex in graph:
+        neighbors = graph[vertex]
+        src.extend([vertex]*len(neighbors))
+        dst.extend(neighbors)
+        if len(src) >= batchSize:
+            yield src, dst
+            src = []
+            dst = []
+    if len(src) > 0:
+        yield src, dst
+
+
+def writeEdgeList(filename, edges, header=[], batchSize=2**16):
+    """ Write an edge list file, one "u v" line per edge, in buffered batches
+
+        @type filename: string
+        @param filename: name of the file
+        @type edges: graph or iterable
+        @param edges: a graph (see iterEdges) or an iterable of batches
+                      (sources, destinations) of vertices
+        @type header: list
+        @param header: lines written at the beginning of the file as comments,
+                       e.g. ["Random graph, id: 001",
+                             "Average clustering coefficient: 0.0042"]
+        @type batchSize: integer
+        @param batchSize: approximate number of edges of each batch
+
+        @rtype: integer
+        @return: the number of edges written
+    """
+    if isinstance(edges, dict) or hasattr(edges, "getGraph"):
+        edges = iterEdges(edges, batchSize)
+    written = 0
+    outfile = open(filename, "w")
+    try:
+        for line in header:
+            outfile.write("#%s\n" % line)
+        for src, dst in edges:
+            k = len(src)
+            pairs = [None]*(2*k)
+            pairs[0::2] = src.tolist() if hasattr(src, "tolist") else src
+            pairs[1::2] = dst.tolist() if hasattr(dst, "tolist") else dst
+            outfile.write(("%s %s\n"*k) % tuple(pairs))
+            written += k
+    finally:
+        outfile.close()
+    return written
+
+
+if __name__ == "__main__":
+
+    ''' ====== TEST IMPORT ===== '''
+    labels, src, dst, header = readEdgeList("./../data/Wiki_Vote.txt")
+    print "--> header"
+    print header["nodes"], header["edges"]
+    print "--> parsed vertices and edges"
+    print len(labels), len(src)
+
+    labels, src, dst, header = readEdgeList("./../data/watts_strogatz.txt")
+    print "--> header"
+    print header["comments"]
+    print "--> parsed vertices and edges"
+    print len(labels), len(src)
+
+    ''' ====== TEST EXPORT ===== '''
+    graph = cg.CompactDirectedGraph(edges=(src, dst), labels=labels)
+    print "--> written edges"
+    print writeEdgeList("./watts_strogatz_copy.txt", graph,
+                        header=["WS graph, id: 001 (copy)"])
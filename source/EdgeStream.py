@@ -0,0 +1,134 @@
+#----------------------------------------------------------------------
+# EdgeStream
+#
+# Contains functions for generating the edges of the graph models as
+# streams of batches, and a counter of edge statistics over a stream, so
+# that graphs larger than memory can be written or measured (the
+# preferential attachment model still keeps one node id per edge, see
+# DirectedPreferentialAttachment.iterAttachmentEdges)
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import RandomDirectedGraph as rg
+import WSDirectedGraph as ws
+import WS2dDirectedGraph as ws2d
+import DirectedPreferentialAttachment as pa
+import numpy as np
+
+STREAMS = {"random": rg.iterRandomEdges,
+           "ws": ws.iterLatticeEdges,
+           "ws2d": ws2d.iterWS2dEdges,
+           "pa": pa.iterAttachmentEdges}
+
+def streamEdges(model, rng=None, batchSize=2**20, **params):
+    """ Return the stream of the edges of a graph model. The batches are
+        sorted by source and hold every out-link of their sources, so they
+        can be written as edge lists (see EdgeListIO.writeEdgeList) or in
+        the binary format (see GraphCache.saveEdgeStream).
+
+        @type model: string
+        @param model: name of the model (see STREAMS): "random", "ws", "ws2d"
+                      or "pa"
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: approximate number of edges of each batch
+        @param params: parameters of the model (e.g. n=10**7, p=10**-6)
+
+        @rtype: generator
+        @return: pairs of arrays (sources, destinations)
+    """
+    if rng is None:
+        rng = np.random
+    return STREAMS[model](rng=rng, batchSize=batchSize, **params)
+
+
+class EdgeCounter:
+    """ Statistics of a stream of edges (number of edges, in and out degrees)
+        updated batch by batch
+    """
+
+    def __init__(self, n):
+        """ Constructor
+
+            @type n: integer
+            @param n: number of nodes (ids 0..n-1)
+        """
+        self.numEdges = 0
+        self.outDegree = np.zeros(n, dtype=np.int64)
+        self.inDegree = np.zeros(n, dtype=np.int64)
+
+    def update(self, src, dst):
+        """ Count a batch of edges
+
+            @type src: array
+            @param src: source of each edge
+            @type dst: array
+            @param dst: destination of each edge
+        """
+        n = len(self.outDegree)
+        self.numEdges += len(src)
+        self.outDegree += np.bincount(src, minlength=n)
+        self.inDegree += np.bincount(dst, minlength=n)
+
+    def observe(self, batches):
+        """ Count the edges of a stream while passing it on, e.g.
+            writeEdgeList(filename, counter.observe(stream))
+
+            @type batches: iterable
+            @param batches: pairs of arrays (sources, destinations)
+
+            @rtype: generator
+            @return: the same batches
+        """
+        for src, dst in batches:
+            self.update(src, dst)
+            yield src, dst
+
+    def consume(self, batches):
+        """ Count all the edges of a stream
+
+            @type batches: iterable
+            @param batches: pairs of arrays (sources, destinations)
+
+            @rtype: EdgeCounter
+            @return: the counter itself
+        """
+        for src, dst in batches:
+            self.update(src, dst)
+        return self
+
+    def degreeHistogram(self, direction="out"):
+        """ Return the degree histogram: element k is the number of nodes
+            with degree k
+
+            @type direction: string
+            @param direction: "out" or "in"
+
+            @rtype: array
+            @return: the histogram
+        """
+        degree = self.outDegree if direction == "out" else self.inDegree
+        return np.bincount(degree)
+
+
+if __name__ == "__main__":
+    import EdgeListIO as io
+    import GraphCache as gc
+    import time
+
+    ''' ====== TEST STATISTICS ===== '''
+    start = time.time()
+    counter = EdgeCounter(10**6).consume(streamEdges("pa", n=10**6, d=10, p=0.3))
+    print "--> edges of a preferential attachment graph (seconds)"
+    print counter.numEdges, time.time() - start
+    print "--> in-degree histogram (first values)"
+    print counter.degreeHistogram("in")[:10]
+
+    ''' ====== TEST EXPORT ===== '''
+    counter = EdgeCounter(10**4)
+    stream = counter.observe(streamEdges("ws2d", n=10**4, r=2, k=3))
+    print "--> written edges"
+    print io.writeEdgeList("./ws2d_stream.txt", stream, header=["WS2d graph (stream)"])
+    print counter.numEdges
+    print gc.saveEdgeStream("./random_stream.csr", 10**4, streamEdges("random", n=10**4, p=0.001))
@@ -0,0 +1,135 @@
+#----------------------------------------------------------------------
+# Ensemble
+#
+# Contains functions for generating ensembles of independent random graphs
+# of a model across a pool of processes, reproducibly from one master seed
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import CompactDirectedGraph as cg
+import RandomDirectedGraph as rg
+import WSDirectedGraph as ws
+import WS2dDirectedGraph as ws2d
+import DirectedPreferentialAttachment as pa
+import EdgeListIO as io
+import GraphCache as gc
+import numpy as np
+import multiprocessing
+import os
+
+MODELS = {"random": rg.RandomDirectedGraph,
+          "ws": ws.WSDirectedGraph,
+          "ws2d": ws2d.WS2dDirectedGraph,
+          "pa": pa.DirectedPreferentialAttachment}
+
+def instanceRng(seed, k):
+    """ Return the random generator of the k-th instance of an ensemble: the
+        streams of different instances are independent and depend only on
+        the master seed and on k (not on the worker generating them)
+
+        @type seed: integer
+        @param seed: master seed of the ensemble
+        @type k: integer
+        @param k: index of the instance
+
+        @rtype: RandomState
+        @return: the random generator
+    """
+    return np.random.RandomState([seed, k])
+
+
+def generateInstance(task):
+    """ Generate an instance of an ensemble (run by the workers)
+
+        @type task: tuple
+        @param task: model name, parameters of the model, master seed, index
+                     of the instance and name of the output file ("" to
+                     return the graph)
+
+        @rtype: tuple
+        @return: the CSR arrays (labels, indptr, indices) of the graph, or
+                 the name of the file where it is written
+    """
+    name, params, seed, k, path = task
+    model = MODELS[name]
+    graph = model(compact=True, rng=instanceRng(seed, k), **params).toCompact()
+    if len(path) == 0:
+        indptr, indices = graph.csr()
+        return graph.labels, indptr, indices
+    header = ["%s graph, seed: %d, instance: %d" % (name, seed, k)]
+    if path.endswith(gc.CACHE_SUFFIX):
+        gc.saveGraph(path, graph, {"model": name, "seed": seed, "instance": k,
+                                   "header": header})
+    else:
+        io.writeEdgeList(path, graph, header)
+    return path
+
+
+def generateEnsemble(model, size, seed=0, processes=None, directory="",
+                     suffix=gc.CACHE_SUFFIX, **params):
+    """ Generate size independent instances of a model with a pool of
+        processes. The k-th instance depends only on seed and k (see
+        instanceRng), so an ensemble is the same whatever the number of
+        processes.
+
+        @type model: string
+        @param model: name of the model (see MODELS): "random", "ws",
+                      "ws2d" or "pa"
+        @type size: integer
+        @param size: number of instances
+        @type seed: integer
+        @param seed: master seed
+        @type processes: integer
+        @param processes: number of processes (default: the number of cores),
+                          1 to generate the instances in this process
+        @type directory: string
+        @param directory: if given, each instance is written in this
+                          directory instead of being returned
+        @type suffix: string
+        @param suffix: format of the written instances: ".csr" for the
+                       binary format (see GraphCache), else an edge list
+        @param params: parameters of the model (e.g. n=1000, p=0.01)
+
+        @rtype: list
+        @return: the instances (CompactDirectedGraph), or the names of the
+                 files where they are written
+    """
+    tasks = []
+    for k in range(size):
+        path = ""
+        if len(directory) > 0:
+            path = os.path.join(directory, "%s_%d_%04d%s" % (model, seed, k, suffix))
+        tasks.append((model, params, seed, k, path))
+
+    if processes == 1:
+        results = [generateInstance(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(generateInstance, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    if len(directory) > 0:
+        return results
+    return [cg.CompactDirectedGraph(csr=(indptr, indices), labels=labels)
+            for labels, indptr, indices in results]
+
+
+if __name__ == "__main__":
+    import time
+
+    ''' ====== TEST ENSEMBLE ===== '''
+    start = time.time()
+    graphs = generateEnsemble("random", 100, seed=42, n=10000, p=0.001)
+    print "--> 100 random graphs (seconds)"
+    print time.time() - start
+    print "--> number of edges of the first instances"
+    print [g.numOfEdges() for g in graphs[:5]]
+
+    graphs = generateEnsemble("ws2d", 4, seed=42, processes=1, n=10000, r=2, k=3)
+    print "--> same instances with one process"
+    print [g.numOfEdges() for g in graphs]
+    graphs = generateEnsemble("ws2d", 4, seed=42, n=10000, r=2, k=3)
+    print [g.numOfEdges() for g in graphs]
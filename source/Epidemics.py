@@ -24,50 +24,91 @@ class Epidemics():
         self.graph = graphDict
         
     
-    def linearThreshold(self, seeds=set(), toPrint  = 0):
-        
-        graph = self.graph
-        infected = set()
-
+    def toCompact(self):
+        """ Return the graph in the compact structure (CSR arrays). A graph
+            dictionary is converted on each call (O(n + m), like a cascade),
+            so edges added to it in the meantime are seen
+        """
+        import CompactDirectedGraph as cg
+        compact = getattr(self.graph, "graph", None) # view of a compact graph
+        if compact is None:
+            compact = cg.CompactDirectedGraph(graphDict=self.graph)
+        return compact
+    
+    def linearThreshold(self, seeds=set(), toPrint  = 0, thresholds=None):
+        """ Simulate the linear threshold model: in each round every node
+            whose fraction of infected (out-)neighbors exceeds its threshold
+            gets infected, until no node does.
+            Each node keeps the counter of its infected neighbors: the nodes
+            infected in a round push an update along their reverse edges, and
+            only the nodes reached are checked in the next round, so a
+            cascade costs O(n + m).
             
+            @type seeds: set
+            @param seeds: nodes infected at the beginning
+            @type toPrint: integer
+            @param toPrint: if 1 the number of infected nodes is printed at
+                            each round
+            @type thresholds: dictionary
+            @param thresholds: threshold of each node (default: uniform in
+                               [0, 1), drawn with np.random in the order of
+                               the nodes of the graph)
+            
+            @rtype: set
+            @return: the infected nodes
+        """
+        graph = self.graph
+        compact = self.toCompact()
+        n = compact.numOfVertices()
+        rindptr, rindices = compact.reverseCSR()
+        degree = compact.outDegrees().astype(float)
+        
         ''' Inizialization ''' 
         #set threshold
-        t = {}
-        for n in graph.keys():
-            t[n] = np.random.uniform()
+        if thresholds is None:
+            nodes = list(graph.keys())
+            thresholds = dict(zip(nodes, np.random.uniform(size=len(nodes))))
+        t = np.full(n, np.inf) # nodes without out-neighbors are never infected
+        for v in thresholds:
+            i = compact.idOf(v)
+            if i is not None:
+                t[i] = thresholds[v]
         
         # add seeds in infected
-        if len(seeds) > 0:
-            for seed in seeds:
-                infected.add(seed)
-               
+        infected = np.zeros(n, dtype=bool)
+        counter = np.zeros(n, dtype=np.int64) # infected out-neighbors
+        ids = [compact.idOf(seed) for seed in seeds]
+        others = set(seed for seed, i in zip(seeds, ids) if i is None) # not in the graph
+        frontier = np.unique(np.array([i for i in ids if i is not None], dtype=np.int64))
+        infected[frontier] = True
+        total = len(frontier) + len(others)
+        # a negative threshold is exceeded with no infected neighbor
+        eager = np.flatnonzero((t < 0) & (degree > 0))
+        
         ''' Epidemics spreading '''
-        toSpread = True
-        while toSpread == True:
+        while True:
             if toPrint == 1:
-                print len(infected)
-            ''' round of spreading''' 
-            toInfect = set()
-            for n in graph.keys():
-                if n not in infected:
-                    # calculates fraction of infected neighbors
-                    f = 0
-                    if len(graph[n]) > 0:
-                        for nv in graph[n]:
-                            if nv in infected:
-                                f += 1
-                        f = f/float(len(graph[n]))
-                        # add n to toInfect eventually
-                        if f > t[n]:
-                            toInfect.add(n)
-            ''' check convergence  '''
-            if len(toInfect) > 0: # add infected node to infected set
-                infected = infected.union(toInfect)
-            else: # there no more nodes to infect
-                toSpread = False
+                print total
+            ''' push the infections of the last round along the reverse edges '''
+            first = rindptr[frontier]
+            count = rindptr[frontier + 1] - first
+            reached = rindices[np.repeat(first - np.cumsum(count) + count, count) +
+                               np.arange(count.sum())]
+            reached, pushed = np.unique(reached, return_counts=True)
+            counter[reached] += pushed
+            reached = np.union1d(reached, eager)
+            eager = eager[:0]
+            ''' round of spreading '''
+            reached = reached[~infected[reached]]
+            new = reached[counter[reached] / degree[reached] > t[reached]]
+            if len(new) == 0: # there no more nodes to infect
+                break
+            infected[new] = True
+            total += len(new)
+            frontier = new
             
         #return 
-        return infected
+        return set(compact.labels[infected].tolist()) | others
      
  
 
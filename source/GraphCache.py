@@ -0,0 +1,268 @@
+#----------------------------------------------------------------------
+# GraphCache
+#
+# Contains functions for saving parsed graphs in a binary format which is
+# memory-mapped on load, and for keeping a cache of it next to the edge
+# list file it comes from
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import CompactDirectedGraph as cg
+import EdgeListIO as io
+import numpy as np
+import json
+import os
+import struct
+
+MAGIC = b"NSGRAPH1"
+ALIGN = 64
+CACHE_SUFFIX = ".csr"
+WRITE_CHUNK = 2**24 # bytes written at a time
+
+''' ========= binary format =========
+    MAGIC | header length (8 bytes, little endian) | JSON header | arrays
+    The header stores, for each array, its dtype, shape and offset in the
+    file (offsets are aligned to 64 bytes), plus free metadata.
+'''
+def saveArrays(path, arrays, meta={}):
+    """ Save some arrays in the binary format. The file is written to a
+        temporary name and then renamed, so a reader never sees a partial file.
+
+        @type path: string
+        @param path: name of the file
+        @type arrays: dictionary
+        @param arrays: name -> array
+        @type meta: dictionary
+        @param meta: metadata saved in the header (must be JSON serializable)
+
+        @raise ValueError: if an array contains Python objects (e.g. a graph
+                           with labels of mixed types)
+    """
+    names = sorted(arrays.keys())
+    layout = {}
+    offset = 0
+    for name in names:
+        a = np.ascontiguousarray(arrays[name])
+        if a.dtype.hasobject:
+            raise ValueError("array %s: only numbers and strings can be saved" % name)
+        layout[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += (a.nbytes + ALIGN - 1) // ALIGN * ALIGN
+    header = json.dumps({"arrays": layout, "meta": meta}).encode("utf-8")
+    start = (len(MAGIC) + 8 + len(header) + ALIGN - 1) // ALIGN * ALIGN
+
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    outfile = open(tmp, "wb")
+    try:
+        outfile.write(MAGIC)
+        outfile.write(struct.pack("<Q", len(header)))
+        outfile.write(header)
+        for name in names:
+            outfile.seek(start + layout[name]["offset"])
+            a = np.ascontiguousarray(arrays[name]).reshape(-1)
+            step = max(WRITE_CHUNK // max(a.itemsize, 1), 1)
+            for first in range(0, len(a), step): # memory maps are not loaded whole
+                outfile.write(a[first:first + step].tobytes())
+        outfile.truncate(start + offset)
+    finally:
+        outfile.close()
+    os.rename(tmp, path)
+
+
+def loadArrays(path, mmap=True):
+    """ Load the arrays saved with saveArrays
+
+        @type path: string
+        @param path: name of the file
+        @type mmap: boolean
+        @param mmap: if True the arrays are read-only memory maps of the file
+                     (the pages are shared among processes), otherwise they
+                     are read in memory
+
+        @rtype: tuple
+        @return: the dictionary name -> array and the metadata
+    """
+    infile = open(path, "rb")
+    try:
+        if infile.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s: not a graph binary file" % path)
+        size = struct.unpack("<Q", infile.read(8))[0]
+        header = json.loads(infile.read(size).decode("utf-8"))
+        start = (len(MAGIC) + 8 + size + ALIGN - 1) // ALIGN * ALIGN
+        arrays = {}
+        for name, info in header["arrays"].items():
+            dtype = np.dtype(str(info["dtype"]))
+            shape = tuple(info["shape"])
+            if mmap and np.prod(shape) > 0:
+                arrays[str(name)] = np.memmap(path, dtype=dtype, mode="r",
+                                              offset=start + info["offset"], shape=shape)
+            else:
+                infile.seek(start + info["offset"])
+                count = int(np.prod(shape))
+                arrays[str(name)] = np.fromfile(infile, dtype=dtype, count=count).reshape(shape)
+    finally:
+        infile.close()
+    return arrays, header["meta"]
+
+
+''' ========= graph cache ========= '''
+def saveGraph(path, graph, meta={}):
+    """ Save a graph in the binary format
+
+        @type path: string
+        @param path: name of the file
+        @type graph: CompactDirectedGraph
+        @param graph: graph to save
+        @type meta: dictionary
+        @param meta: metadata saved in the header
+    """
+    indptr, indices = graph.csr()
+    saveArrays(path, {"labels": graph.labels, "indptr": indptr, "indices": indices}, meta)
+
+
+def loadGraph(path, mmap=True):
+    """ Load a graph saved with saveGraph
+
+        @type path: string
+        @param path: name of the file
+        @type mmap: boolean
+        @param mmap: if True the arrays are memory-mapped
+
+        @rtype: CompactDirectedGraph
+        @return: the graph (its metadata are in graph.meta)
+    """
+    arrays, meta = loadArrays(path, mmap)
+    graph = cg.CompactDirectedGraph(csr=(arrays["indptr"], arrays["indices"]),
+                                    labels=arrays["labels"])
+    graph.meta = meta
+    return graph
+
+
+def saveEdgeStream(path, n, batches, meta={}):
+    """ Save in the binary format a graph whose edges come as a stream of
+        batches (e.g. a generator of EdgeStream), without holding it in
+        memory: the destinations are spooled to a temporary file and the
+        row pointers are built from the out-degrees.
+
+        @type path: string
+        @param path: name of the file
+        @type n: integer
+        @param n: number of nodes (labels 0..n-1)
+        @type batches: iterable
+        @param batches: pairs of arrays (sources, destinations) of node ids,
+                        sorted by source across the whole stream and without
+                        repeated edges
+        @type meta: dictionary
+        @param meta: metadata saved in the header
+
+        @rtype: integer
+        @return: the number of edges saved
+
+        @raise ValueError: if the sources are not sorted
+    """
+    degree = np.zeros(n, dtype=np.int64)
+    spool = "%s.%d.indices" % (path, os.getpid())
+    dtype = cg.indexType(n)
+    last = 0
+    outfile = open(spool, "wb")
+    try:
+        for src, dst in batches:
+            src = np.asarray(src)
+            if len(src) == 0:
+                continue
+            if src[0] < last or np.any(src[1:] < src[:-1]):
+                raise ValueError("%s: the edges are not sorted by source" % path)
+            last = src[-1]
+            degree += np.bincount(src, minlength=n)
+            np.asarray(dst, dtype=dtype).tofile(outfile)
+        outfile.close()
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degree, out=indptr[1:])
+        if indptr[-1] > 0:
+            indices = np.memmap(spool, dtype=dtype, mode="r", shape=(int(indptr[-1]),))
+        else:
+            indices = np.zeros(0, dtype=dtype)
+        saveArrays(path, {"labels": np.arange(n), "indptr": indptr, "indices": indices}, meta)
+        del indices
+    finally:
+        outfile.close()
+        os.remove(spool)
+    return int(indptr[-1])
+
+
+def sourceStamp(filename):
+    """ Return the size and the modification time of a file """
+    info = os.stat(filename)
+    return {"size": info.st_size, "mtime": info.st_mtime}
+
+
+def cachePath(filename):
+    """ Return the name of the cache file of an edge list file """
+    return filename + CACHE_SUFFIX
+
+
+def readCachedArrays(filename, mmap=True):
+    """ Return the CSR arrays of the graph stored in an edge list file, using
+        the sidecar cache file (filename + ".csr") when it is up to date with
+        the size and the modification time of filename. Otherwise the edge
+        list is parsed and the cache is (re)written; if it cannot be written
+        the arrays are returned anyway.
+
+        @type filename: string
+        @param filename: name of the edge list file
+        @type mmap: boolean
+        @param mmap: if True the cached arrays are memory-mapped
+
+        @rtype: tuple
+        @return: labels, indptr, indices and the header of the file
+    """
+    path = cachePath(filename)
+    stamp = sourceStamp(filename)
+    if os.path.exists(path):
+        try:
+            arrays, meta = loadArrays(path, mmap)
+            if meta.get("source") == stamp:
+                return arrays["labels"], arrays["indptr"], arrays["indices"], meta["header"]
+        except (IOError, ValueError, KeyError):
+            pass # unreadable cache: rebuild it
+
+    labels, src, dst, header = io.readEdgeList(filename)
+    indptr, indices = cg.buildCSR(len(labels), src, dst)
+    try:
+        saveArrays(path, {"labels": labels, "indptr": indptr, "indices": indices},
+                   {"source": stamp, "header": header})
+    except (IOError, OSError):
+        pass
+    return labels, indptr, indices, header
+
+
+def readCachedGraph(filename, mmap=True):
+    """ Return the graph stored in an edge list file, using its cache file
+        (see readCachedArrays)
+
+        @type filename: string
+        @param filename: name of the edge list file
+        @type mmap: boolean
+        @param mmap: if True the cached arrays are memory-mapped
+
+        @rtype: CompactDirectedGraph
+        @return: the graph
+    """
+    return cg.CompactDirectedGraph(filename=filename, cache=True, mmap=mmap)
+
+
+if __name__ == "__main__":
+    import time
+
+    ''' ====== TEST CACHE ===== '''
+    start = time.time()
+    graph = readCachedGraph("./../data/Wiki_Vote.txt")
+    print "--> first load (seconds)"
+    print time.time() - start
+
+    start = time.time()
+    graph = readCachedGraph("./../data/Wiki_Vote.txt")
+    print "--> warm load (seconds)"
+    print time.time() - start
+
+    print "--> number of vertices and edges"
+    print graph.numOfVertices(), graph.numOfEdges()
@@ -0,0 +1,386 @@
+#----------------------------------------------------------------------
+# GraphTraversal
+#
+# Contains a breadth first search kernel over the CSR arrays of a compact
+# graph and the analyses built on it: connected components and diameter
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import CompactDirectedGraph as cg
+import numpy as np
+
+class BreadthFirstSearch:
+    """ Level-synchronous breadth first search over CSR arrays: each level is
+        expanded with array operations. The distance array is allocated once
+        and reset only on the nodes visited by the previous search, so many
+        searches on the same graph cost O(visited nodes + edges) each.
+    """
+
+    def __init__(self, indptr, indices):
+        """ Constructor
+
+            @type indptr: array
+            @param indptr: CSR row pointers
+            @type indices: array
+            @param indices: CSR column indices (out-neighbors)
+        """
+        self.indptr = indptr
+        self.indices = indices
+        n = len(indptr) - 1
+        self.distance = np.full(n, -1, dtype=np.int32)
+        self.mark = np.zeros(n, dtype=np.int64) # to drop repeated nodes
+        self.steps = np.arange(max(len(indices), n), dtype=np.int64)
+        self.levels = []
+        self.dag = []
+
+    def run(self, sources, dag=False):
+        """ Search the graph from one or more sources; the distance of each
+            node is in self.distance (-1 if not reached) and the nodes of
+            each level are in self.levels
+
+            @type sources: integer or array
+            @param sources: node id(s) of the source(s)
+            @type dag: boolean
+            @param dag: if True the edges of the shortest paths are kept too:
+                        self.dag[i] holds the arrays (u, v) of the edges from
+                        level i to level i+1
+
+            @rtype: integer
+            @return: the eccentricity of the sources (last level reached)
+        """
+        for level in self.levels:
+            self.distance[level] = -1
+        frontier = np.unique(np.atleast_1d(sources)).astype(np.int64)
+        self.distance[frontier] = 0
+        self.levels = [frontier]
+        self.dag = []
+        depth = 0
+        while True:
+            ''' out-neighbors of the frontier not reached yet '''
+            first = self.indptr[frontier]
+            count = self.indptr[frontier + 1] - first
+            total = int(count.sum())
+            if total == 0:
+                break
+            offset = np.repeat(first - np.cumsum(count) + count, count)
+            nbrs = self.indices[offset + self.steps[:total]]
+            new = self.distance[nbrs] < 0
+            if dag:
+                self.dag.append((np.repeat(frontier, count)[new], nbrs[new]))
+            nbrs = nbrs[new]
+            self.mark[nbrs] = self.steps[:len(nbrs)]
+            nbrs = nbrs[self.mark[nbrs] == self.steps[:len(nbrs)]]
+            if len(nbrs) == 0:
+                if dag:
+                    self.dag.pop()
+                break
+            depth += 1
+            self.distance[nbrs] = depth
+            self.levels.append(nbrs.astype(np.int64))
+            frontier = self.levels[-1]
+        return depth
+
+    def visited(self):
+        """ Return the node ids reached by the last search """
+        return np.concatenate(self.levels)
+
+
+''' ========= components ========= '''
+def components(indptr, indices):
+    """ Label the (weakly) connected components: the labels of the endpoints
+        of the edges are hooked to the smaller one and shortcut by pointer
+        jumping, until every edge joins nodes with the same label.
+
+        @type indptr: array
+        @param indptr: CSR row pointers
+        @type indices: array
+        @param indices: CSR column indices
+
+        @rtype: array
+        @return: the component of each node (the smallest node id in it)
+    """
+    n = len(indptr) - 1
+    parent = np.arange(n)
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    dst = np.asarray(indices, dtype=np.int64)
+    while True:
+        low = np.minimum(parent[src], parent[dst])
+        high = np.maximum(parent[src], parent[dst])
+        keep = low != high
+        if not keep.any():
+            return parent
+        src = src[keep]
+        dst = dst[keep]
+        low = low[keep]
+        high = high[keep]
+        ''' hook each root to the smallest root it is joined to '''
+        order = np.argsort(high, kind="mergesort")
+        high = high[order]
+        low = low[order]
+        starts = np.flatnonzero(np.concatenate(([True], high[1:] != high[:-1])))
+        parent[high[starts]] = np.minimum.reduceat(low, starts)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+def largestComponent(indptr, indices):
+    """ Return the size and the number of edges of the largest (weakly)
+        connected component
+
+        @type indptr: array
+        @param indptr: CSR row pointers
+        @type indices: array
+        @param indices: CSR column indices
+
+        @rtype: tuple
+        @return: number of nodes, number of edges (each stored edge counts
+                 1/2, as in an undirected graph stored in both directions)
+                 and the component of each node
+    """
+    labels = components(indptr, indices)
+    if len(labels) == 0:
+        return 0, 0, labels
+    sizes = np.bincount(labels)
+    largest = np.argmax(sizes)
+    edges = np.diff(indptr)[labels == largest].sum()
+    return int(sizes[largest]), int(edges // 2), labels
+
+
+''' ========= diameter ========= '''
+def isSymmetric(indptr, indices):
+    """ Return True if each edge u->v of the graph has its reverse v->u """
+    n = len(indptr) - 1
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    dst = np.asarray(indices, dtype=np.int64)
+    return np.array_equal(np.sort(src*n + dst), np.sort(dst*n + src))
+
+
+def ifub(bfs, start):
+    """ Exact diameter of the connected component of start in a symmetric
+        graph with the iFUB algorithm: a double sweep picks a central node u,
+        then the eccentricities of the nodes of the BFS levels of u are
+        computed from the farthest level inward, until the lower bound
+        exceeds the upper bound given by the level (usually a handful of
+        searches).
+
+        @type bfs: BreadthFirstSearch
+        @param bfs: search kernel of the graph
+        @type start: integer
+        @param start: a node of the component
+
+        @rtype: integer
+        @return: the diameter of the component
+    """
+    ''' double sweep: the middle of a long shortest path '''
+    bfs.run(start)
+    a = bfs.levels[-1][0]
+    lower = bfs.run(a)
+    b = bfs.levels[-1][0]
+    fromA = bfs.distance.copy()
+    bfs.run(b)
+    middle = np.flatnonzero((fromA + bfs.distance == lower) & (fromA == lower // 2))
+    u = middle[0] if len(middle) > 0 else a
+
+    i = bfs.run(u)
+    levels = list(bfs.levels)
+    lower = max(lower, i)
+    upper = 2*i
+    while upper > lower and i > 0:
+        for x in levels[i]:
+            lower = max(lower, bfs.run(x))
+        if lower > 2*(i - 1):
+            break
+        upper = 2*(i - 1)
+        i -= 1
+    return lower
+
+
+def directedDiameter(indptr, indices, words=8, sources=None):
+    """ Exact diameter (largest finite distance) of a directed graph, with
+        bit-parallel breadth first searches: 64*words sources are searched at
+        once, each node keeping the bitset of the sources which reached it,
+        and a level costs a pass over the edges for all of them.
+
+        @type indptr: array
+        @param indptr: CSR row pointers
+        @type indices: array
+        @param indices: CSR column indices
+        @type words: integer
+        @param words: number of 64 bit words of the bitsets
+        @type sources: array
+        @param sources: node ids whose eccentricity is computed (default:
+                        every node)
+
+        @rtype: integer
+        @return: the diameter (the largest eccentricity of the sources)
+    """
+    n = len(indptr) - 1
+    words = max(min(words, 2**24 // max(len(indices), 1)), 1) # bounded memory
+    ''' in-edges of each node, to pull the bitsets of the frontier '''
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    order = np.argsort(indices, kind="mergesort")
+    pull = src[order]
+    targets = np.asarray(indices)[order]
+    rows = np.flatnonzero(np.bincount(targets, minlength=n) > 0)
+    starts = np.searchsorted(targets, rows)
+    active = np.diff(indptr) > 0 # the other nodes reach nobody
+    if sources is None:
+        sources = np.flatnonzero(active)
+    else:
+        sources = np.asarray(sources, dtype=np.int64)
+        sources = sources[active[sources]]
+    bit = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+    diameter = 0
+    for first in range(0, len(sources), 64*words):
+        batch = sources[first:first + 64*words]
+        visited = np.zeros((n, words), dtype=np.uint64)
+        k = np.arange(len(batch))
+        visited[batch, k // 64] |= bit[k % 64]
+        frontier = visited.copy()
+        depth = 0
+        while len(rows) > 0:
+            reached = np.bitwise_or.reduceat(frontier[pull], starts, axis=0)
+            new = reached & ~visited[rows]
+            if not new.any():
+                break
+            depth += 1
+            visited[rows] |= new
+            frontier[:] = 0
+            frontier[rows] = new
+        diameter = max(diameter, depth)
+    return diameter
+
+
+def difub(indptr, indices, words=8, maxSearches=None):
+    """ Exact diameter (largest finite distance) of a directed graph with the
+        DiFUB algorithm, extended to graphs which are not strongly connected.
+        A hub u (highest degree) is searched forward and backward: a pair
+        x->y with x reaching u and y reached from u is at distance at most
+        d(x, u) + d(u, y), so the eccentricities (backward, respectively
+        forward) of the nodes of the levels of u are computed from the
+        farthest level inward, until the lower bound exceeds twice the
+        level. The other pairs start from a node which does not reach u or
+        end in a node not reached from u: the eccentricities of those nodes
+        are computed with bit-parallel searches (see directedDiameter).
+
+        @type indptr: array
+        @param indptr: CSR row pointers
+        @type indices: array
+        @param indices: CSR column indices
+        @type words: integer
+        @param words: number of 64 bit words of the bit-parallel searches
+        @type maxSearches: integer
+        @param maxSearches: max number of searches from the levels of u
+                            (default: 1/16 of the nodes with out-links)
+
+        @rtype: integer
+        @return: the diameter, None if the bounds do not close within the
+                 budget (then the exhaustive search is cheaper)
+    """
+    n = len(indptr) - 1
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    rindptr, rindices = cg.buildCSR(n, indices, src)
+    outDegree = np.diff(indptr)
+    inDegree = np.diff(rindptr)
+    sources = int((outDegree > 0).sum())
+    if maxSearches is None:
+        maxSearches = max(sources // 16, 64)
+    forward = BreadthFirstSearch(indptr, indices)
+    backward = BreadthFirstSearch(rindptr, rindices)
+
+    ''' forward and backward levels of the hub '''
+    u = int(np.argmax(outDegree + inDegree))
+    lower = forward.run(u)
+    forwardLevels = list(forward.levels)
+    reached = forward.distance >= 0
+    lower = max(lower, backward.run(u))
+    backwardLevels = list(backward.levels)
+    reaching = backward.distance >= 0
+
+    ''' pairs which do not go through the hub '''
+    outside = np.flatnonzero(~reaching & (outDegree > 0))
+    inside = np.flatnonzero(~reached & (inDegree > 0))
+    if len(outside) + len(inside) > sources // 2:
+        return None
+    if len(outside) > 0:
+        lower = max(lower, directedDiameter(indptr, indices, words, outside))
+    if len(inside) > 0:
+        lower = max(lower, directedDiameter(rindptr, rindices, words, inside))
+
+    ''' pairs through the hub, from the farthest level inward '''
+    i = max(len(forwardLevels), len(backwardLevels)) - 1
+    upper = 2*i
+    searches = 0
+    while upper > lower and i > 0:
+        toLevel = forwardLevels[i] if i < len(forwardLevels) else []
+        fromLevel = backwardLevels[i] if i < len(backwardLevels) else []
+        searches += len(toLevel) + len(fromLevel)
+        if searches > maxSearches:
+            return None
+        for y in toLevel:
+            lower = max(lower, backward.run(y))
+        for x in fromLevel:
+            lower = max(lower, forward.run(x))
+        if lower > 2*(i - 1):
+            break
+        upper = 2*(i - 1)
+        i -= 1
+    return lower
+
+
+def diameter(graph):
+    """ Return the exact diameter of a graph (largest finite distance): with
+        iFUB on each connected component if the graph is symmetric,
+        otherwise with DiFUB (see difub), falling back to bit-parallel
+        searches from every node (see directedDiameter) if its bounds do not
+        close
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+
+        @rtype: integer
+        @return: the diameter
+    """
+    indptr, indices = graph.csr()
+    if len(indices) == 0:
+        return 0
+    if not isSymmetric(indptr, indices):
+        best = difub(indptr, indices)
+        if best is None:
+            best = directedDiameter(indptr, indices)
+        return best
+    labels = components(indptr, indices)
+    sizes = np.bincount(labels)
+    bfs = BreadthFirstSearch(indptr, indices)
+    best = 0
+    for label in np.argsort(-sizes, kind="mergesort"):
+        if sizes[label] - 1 <= best: # no longer path in the smaller ones
+            break
+        best = max(best, ifub(bfs, label))
+    return best
+
+
+if __name__ == "__main__":
+    import time
+
+    ''' ====== TEST DIAMETER ===== '''
+    for name in ["Wiki_Vote", "Facebook"]:
+        graph = cg.CompactDirectedGraph(filename="./../data/%s.txt" % name)
+        indptr, indices = graph.csr()
+        start = time.time()
+        print "--> %s: largest component (nodes, edges)" % name
+        print largestComponent(indptr, indices)[:2]
+        print "--> diameter"
+        print diameter(graph)
+        print "--> diameter of the symmetric graph"
+        src = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        symmetric = cg.CompactDirectedGraph(edges=(np.concatenate((src, indices)),
+                                                   np.concatenate((indices, src))),
+                                            labels=graph.labels)
+        print diameter(symmetric)
+        print "--> seconds"
+        print time.time() - start
@@ -11,16 +11,65 @@ class NaiveDirectedGraph:
     """ Simple Graph class which contains basics graph methods """
     
     '''========= constructor ========='''    
-    def __init__(self, graphDict={}, filename=""):
+    def __init__(self, graphDict={}, filename="", reverseIndex=False):
         """ constructor
         
             @type graphDict: graph
             @param graphDict: a graph in a dictionary structure
+            @type filename: string
+            @param filename: name of the file containing the graph
+            @type reverseIndex: boolean
+            @param reverseIndex: if True the reverse index (in-neighbors of
+                                 each vertex) is built while loading the graph
         """
-        if len(filename) > 0:
-            self.graphDict = self.readGraph(filename)
+        if len(filename) > 0 and reverseIndex:
+            graph, reverse = self.readGraph(filename, reverse=True)
+            self.setGraph(graph, reverse)
+        elif len(filename) > 0:
+            self.setGraph(self.readGraph(filename))
         else:
-            self.graphDict = graphDict
+            self.setGraph(graphDict)
+            if reverseIndex:
+                self.getReverseGraph()
+    
+    '''========= graph set methods ========='''
+    def setGraph(self, graphDict, reverseDict=None):
+        """ Set the dictionary structure containing the graph.
+            The counters of edges and degrees are computed once, on the first
+            query, and then kept up to date by addVertex and addEdge; so are
+            the reverse index, built on the first in-neighbors query, and
+            the triangle counts (see triangleIndex). The version of the
+            graph is increased (see version).
+            
+            @type graphDict: graph
+            @param graphDict: a graph in a dictionary structure
+            @type reverseDict: graph
+            @param reverseDict: the reverse graph (vertex -> in-neighbors),
+                                if it is already available
+        """
+        self.graphDict = graphDict
+        self._counted = None
+        self._reverse = reverseDict
+        self._triangleIndex = None
+        self._version = getattr(self, "_version", 0) + 1
+    
+    def _counters(self):
+        """ Compute the edge counter and the out-degrees if the graph
+            structure changed since they were computed
+        """
+        if getattr(self, "_counted", None) is not self.graphDict:
+            graph = self.getGraph()
+            self._outDegree = dict((v, len(graph[v])) for v in graph)
+            self._numEdges = sum(self._outDegree.values())
+            self._inDegree = None # computed on the first in-degree query
+            self._counted = self.graphDict
+    
+    def _compactGraph(self):
+        """ Return the CompactDirectedGraph whose view is stored as graph
+            structure (generators in compact mode), None if the graph is
+            stored in a dictionary
+        """
+        return getattr(self.graphDict, "graph", None)
     
     '''========= graph get methods ========='''
     def getGraph(self):
@@ -31,6 +80,70 @@ class NaiveDirectedGraph:
         """ Return the vertices of a graph """
         return list(self.graphDict.keys())
 
+    def version(self):
+        """ Return the version of the graph: it changes whenever the graph is
+            set or a vertex or an edge is added, so results computed on the
+            graph can be kept along with it (see CentralityCache)
+        """
+        if self._compactGraph() is not None and self._compactGraph() is not self:
+            return (self._version, self._compactGraph().version())
+        return self._version
+
+    def getReverseGraph(self):
+        """ Return the reverse graph in a dictionary structure: each vertex is
+            mapped to its in-neighbors. It is built once (O(n+m)) and then
+            kept in sync by addVertex and addEdge.
+        """
+        if self._compactGraph() is not None:
+            return self._compactGraph().getReverseGraph()
+        if self._reverse is None:
+            graph = self.getGraph()
+            reverse = dict((v, []) for v in graph)
+            for v in graph:
+                for nbr in graph[v]:
+                    if nbr not in reverse:
+                        reverse[nbr] = []
+                    reverse[nbr].append(v)
+            self._reverse = reverse
+        return self._reverse
+
+    def triangleIndex(self, processes=None):
+        """ Return the triangles and the clustering of the undirected graph
+            underlying the graph (see Triangles.TriangleIndex). They are
+            counted on the first call and then kept up to date by addVertex
+            and addEdge, so clustering queries between insertions cost only
+            the neighborhoods the new edges touch.
+
+            @type processes: integer
+            @param processes: number of processes of the first count
+
+            @rtype: TriangleIndex
+            @return: the triangle counts
+        """
+        import Triangles as tr
+        if self._triangleIndex is None:
+            self._triangleIndex = tr.TriangleIndex(self.toCompact(), processes)
+        return self._triangleIndex
+
+    def inNeighbors(self, vertex):
+        """ Return the in-neighbors of a vertex (see getReverseGraph)
+        
+            @type vertex: vertex
+            @param vertex: vertex of the graph
+        """
+        return self.getReverseGraph()[vertex]
+
+    def toCompact(self):
+        """ Return the graph in a compact (CSR arrays) structure
+
+            @rtype: CompactDirectedGraph
+            @return: the graph stored in arrays
+        """
+        import CompactDirectedGraph as cg
+        if self._compactGraph() is not None:
+            return self._compactGraph()
+        return cg.CompactDirectedGraph(graphDict=self.getGraph())
+
     def edges(self):
         """ Return a list of the edges of the graph 
             (Edges need to be generated).
@@ -44,33 +157,80 @@ class NaiveDirectedGraph:
         
     def numOfEdges(self):
         """ Return the number of the edges of a graph """
-        return len(self.edges())
+        if self._compactGraph() is not None:
+            return self._compactGraph().numOfEdges()
+        self._counters()
+        return self._numEdges
  
     def numOfVertices(self):
-        """ Return the number of the edges of a graph """
-        return len(self.vertices())
+        """ Return the number of the vertices of a graph """
+        return len(self.graphDict)
+
+    def outDegree(self, vertex):
+        """ Return the out-degree of a vertex
+        
+            @type vertex: vertex
+            @param vertex: vertex of the graph
+        """
+        if self._compactGraph() is not None:
+            return self._compactGraph().outDegree(vertex)
+        self._counters()
+        return self._outDegree[vertex]
+
+    def inDegree(self, vertex):
+        """ Return the in-degree of a vertex
+        
+            @type vertex: vertex
+            @param vertex: vertex of the graph
+        """
+        if self._compactGraph() is not None:
+            return self._compactGraph().inDegree(vertex)
+        self._counters()
+        if self._inDegree is None:
+            graph = self.getGraph()
+            self._inDegree = dict.fromkeys(graph, 0)
+            for v in graph:
+                for nbr in graph[v]:
+                    self._inDegree[nbr] = self._inDegree.get(nbr, 0) + 1
+        return self._inDegree[vertex]
      
-    def readGraph(self, filename):
-        """ Read filename and return the graph in a dictionary structure
+    def readGraph(self, filename, reverse=False):
+        """ Read filename and return the graph in a dictionary structure.
+            The node and edge counts declared in a SNAP header are stored in
+            self.header (see EdgeListIO.parseHeader).
         
             @type filename: string        
             @param filename: name of the file coitaining the graph
+            @type reverse: boolean
+            @param reverse: if True the reverse graph is built too
             
             @rtype: graph
-            @return: graph 
-    
-        """
-        infile = open(filename,"r")
-        graph = {}
-        for line in infile:
-          if "#" not in line: # commented line
-            u,v = line.split()
-            if u not in graph:
-              graph[u] = set()
-            graph[u].add(v)
-            if v not in graph:
-              graph[v] = set()
-        return graph     
+            @return: graph, or the pair (graph, reverse graph) if reverse is
+                     True
+    
+        """
+        import EdgeListIO as io
+        labels, src, dst, self.header = io.readEdgeList(filename)
+        labels = labels.astype(str)
+        if reverse:
+            return io.edgesToDict(labels, src, dst), io.edgesToDict(labels, dst, src)
+        return io.edgesToDict(labels, src, dst)
+
+    def writeGraph(self, filename, header=[]):
+        """ Write the graph in filename as an edge list (see
+            EdgeListIO.writeEdgeList). Edges are streamed from the graph in
+            batches.
+
+            @type filename: string
+            @param filename: name of the file
+            @type header: list
+            @param header: comment lines written at the beginning of the file
+
+            @rtype: integer
+            @return: the number of edges written
+        """
+        import EdgeListIO as io
+        return io.writeEdgeList(filename, self, header)
      
     ''' ========= graph add methods ========='''
     def addVertex(self, vertex):
@@ -80,8 +240,19 @@ class NaiveDirectedGraph:
             @type vertex: vertex
             @param vertex: vertex to add
         """
-        if vertex not in self.graphDict:
+        if self._triangleIndex is not None:
+            self._triangleIndex.addVertex(vertex)
+        if self._compactGraph() is not None:
+            self._compactGraph().addVertex(vertex)
+        elif vertex not in self.graphDict:
             self.graphDict[vertex] = []
+            self._version += 1
+            if self._reverse is not None:
+                self._reverse[vertex] = []
+            if self._counted is self.graphDict:
+                self._outDegree[vertex] = 0
+                if self._inDegree is not None:
+                    self._inDegree[vertex] = 0
     
     def addEdge(self, vertex1, vertex2):
         """ Add an edge to the graph between the pair "vertex1-vertex2"s
@@ -91,8 +262,31 @@ class NaiveDirectedGraph:
             @type vertex2: vertex
             @param vertex2 -- vertex of the graph
         """
-        if vertex1 in self.graphDict and vertex2 in self.graphDict:
-            self.graphDict[vertex1].append(vertex2)
+        if self._compactGraph() is not None:
+            if self._triangleIndex is not None:
+                self._triangleIndex.addEdge(vertex1, vertex2)
+            self._compactGraph().addEdge(vertex1, vertex2)
+        elif vertex1 in self.graphDict and vertex2 in self.graphDict:
+            neighbors = self.graphDict[vertex1]
+            if isinstance(neighbors, set): # graphs read from file
+                if vertex2 in neighbors:
+                    return
+                neighbors.add(vertex2)
+            else:
+                neighbors.append(vertex2)
+            self._version += 1
+            if self._triangleIndex is not None:
+                self._triangleIndex.addEdge(vertex1, vertex2)
+            if self._reverse is not None:
+                if isinstance(self._reverse[vertex2], set):
+                    self._reverse[vertex2].add(vertex1)
+                else:
+                    self._reverse[vertex2].append(vertex1)
+            if self._counted is self.graphDict:
+                self._numEdges += 1
+                self._outDegree[vertex1] += 1
+                if self._inDegree is not None:
+                    self._inDegree[vertex2] += 1
     
     '''========= graph utility methods =========''' 
     def plot(self, layout = "circular", nodeSize= 600, widthEdge=2):
@@ -107,13 +301,15 @@ class NaiveDirectedGraph:
 
     '''========= to string ========='''
     def __str__(self):
-        res = "vertices: "
-        for k in self.graphDict:
-            res += str(k) + " "
-        res += "\nedges: "
-        for edge in self.edges():
-            res += str(edge) + " "
-        return res
+        graph = self.getGraph()
+        res = ["vertices: "]
+        for k in graph:
+            res.append(str(k) + " ")
+        res.append("\nedges: ")
+        for k in graph:
+            for neighbour in graph[k]:
+                res.append(str({k, neighbour}) + " ")
+        return "".join(res)
        
        
 if __name__ == "__main__":
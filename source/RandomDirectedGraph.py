@@ -6,7 +6,141 @@
 # Author: Emanuele Pesce
 #----------------------------------------------------------------------
 import NaiveDirectedGraph as dg
-import random 
+import CompactDirectedGraph as cg
+import numpy as np
+
+def skipSample(total, p, rng=np.random, batchSize=2**20):
+    """ Select each position of [0, total) independently with probability p,
+        jumping from a selected position to the next one with geometric
+        skips: the cost is proportional to the number of selected positions.
+
+        @type total: integer
+        @param total: number of positions
+        @type p: real[0,1]
+        @param p: probability to select a position
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: max number of skips drawn at a time
+
+        @rtype: generator
+        @return: arrays of increasing positions
+    """
+    if p <= 0 or total <= 0:
+        return
+    last = -1 # last selected position
+    while last < total - 1:
+        expected = (total - 1 - last)*p
+        size = int(min(batchSize, expected + 4*np.sqrt(expected) + 16))
+        positions = last + np.cumsum(rng.geometric(p, size=size))
+        if positions[-1] >= total:
+            yield positions[positions < total]
+            return
+        yield positions
+        last = positions[-1]
+
+
+def samplePositions(total, m, rng=np.random):
+    """ Select exactly m distinct positions of [0, total) uniformly at random
+        (sampling without replacement) with vectorized batches: positions are
+        drawn in blocks and merged until m distinct ones are found, then m of
+        them are kept at random. When m > total/2 the total - m positions to
+        leave out are sampled instead, so a batch never wastes more than half
+        of its draws.
+
+        @type total: integer
+        @param total: number of positions
+        @type m: integer
+        @param m: number of positions to select (at most total)
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+
+        @rtype: array
+        @return: the sorted selected positions
+    """
+    m = min(m, total)
+    if 2*m > total:
+        keep = np.ones(total, dtype=bool)
+        keep[samplePositions(total, total - m, rng)] = False
+        return np.flatnonzero(keep)
+    selected = np.zeros(0, dtype=np.int64)
+    while len(selected) < m:
+        missing = m - len(selected)
+        draws = rng.randint(0, total, size=int(missing*1.1) + 16, dtype=np.int64)
+        selected = np.unique(np.concatenate((selected, draws)))
+    if len(selected) > m:
+        selected = np.sort(rng.permutation(selected)[:m])
+    return selected
+
+
+def positionsToPairs(n, positions):
+    """ Return the ordered pairs (i, j), i != j, numbered by positions:
+        position k is the pair i = k / (n-1), j = k % (n-1) (+1 if it is >= i)
+
+        @type n: integer
+        @param n: number of nodes
+        @type positions: array
+        @param positions: positions in [0, n(n-1))
+
+        @rtype: tuple
+        @return: arrays src and dst of the pairs
+    """
+    src = positions // max(n-1, 1)
+    dst = positions - src*(n-1)
+    dst += dst >= src
+    return src, dst
+
+
+def pairsToGraph(n, positions):
+    """ Build the compact graph whose edges are the ordered pairs numbered by
+        positions (see positionsToPairs)
+
+        @type n: integer
+        @param n: number of nodes
+        @type positions: array
+        @param positions: sorted positions in [0, n(n-1))
+
+        @rtype: CompactDirectedGraph
+        @return: the graph
+    """
+    src, dst = positionsToPairs(n, positions)
+    # positions are sorted, so the CSR arrays follow without sorting
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return cg.CompactDirectedGraph(csr=(indptr, dst.astype(cg.indexType(n))), labels=np.arange(n))
+
+
+def iterRandomEdges(n, p, rng=np.random, batchSize=2**20):
+    """ Yield the edges of a random graph (see genRandomGraph) in batches,
+        sorted by source, without holding the graph in memory. A batch
+        holds every out-link of its sources: the out-links of the last
+        source of a sample are carried over to the next batch.
+
+        @type n: integer
+        @param n: number of nodes
+        @type p: real[0,1]
+        @param p: probability to have and edge between a pair of nodes
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: approximate number of edges of each batch (a
+                          batch can exceed it by one out-degree)
+
+        @rtype: generator
+        @return: pairs of arrays (sources, destinations)
+    """
+    carry = np.zeros(0, dtype=np.int64) # out-links of an unfinished source
+    for positions in skipSample(n*(n-1), p, rng, batchSize):
+        positions = np.concatenate((carry, positions))
+        if len(positions) == 0:
+            continue
+        cut = np.searchsorted(positions, (positions[-1] // (n-1))*(n-1))
+        carry = positions[cut:]
+        if cut > 0:
+            yield positionsToPairs(n, positions[:cut])
+    if len(carry) > 0:
+        yield positionsToPairs(n, carry)
+
 
 class RandomDirectedGraph(dg.NaiveDirectedGraph):
     """ Directed Random Graph class. Extends Naive Directed Graph class.
@@ -15,7 +149,8 @@ class RandomDirectedGraph(dg.NaiveDirectedGraph):
     """
     
     '''========= constructor ========='''    
-    def __init__(self, n=5, p=0.5, e_inf = 0, e_sup = 0, graphDict={}):
+    def __init__(self, n=5, p=0.5, e_inf = 0, e_sup = 0, graphDict={},
+                 compact=False, m=None, rng=None):
         """ Constructor
             
             @type n: integer
@@ -24,49 +159,122 @@ class RandomDirectedGraph(dg.NaiveDirectedGraph):
             @param p: probability to have and edge between a pair of nodes 
             @type graphDict: graph            
             @param graphDict: if graphDict is not passed, it will be generated
+            @type compact: boolean
+            @param compact: if True the graph is generated in O(n + m) time
+                            directly in a CompactDirectedGraph (see
+                            genRandomGraph_sparse, or genRandomGraph_gnm
+                            when the number of edges is given by m or by
+                            e_inf and e_sup)
+            @type m: integer
+            @param m: exact number of edges of the compact mode
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one),
+                        pass a seeded one for reproducible graphs
          """
         self.p = p
-        if  e_sup > 0:
+        if rng is None:
+            rng = np.random
+        if compact:
+            self.n = n
+            if m is None and e_sup > 0:
+                m = rng.randint(e_inf, e_sup + 1)
+            if m is not None:
+                self.setGraph(self.genRandomGraph_gnm(self.n, m, rng).getGraph())
+            else:
+                self.setGraph(self.genRandomGraph_sparse(self.n, self.p, rng).getGraph())
+        elif  e_sup > 0:
             self.n  = n
-            self.graphDict = self.genRandomGraph_control(self.n, self.p, e_inf, e_sup)
+            self.setGraph(self.genRandomGraph_control(self.n, self.p, e_inf, e_sup, rng))
         elif len(graphDict) < 1:
             self.n = n           
-            self.graphDict = self.genRandomGraph(self.n,self.p)
+            self.setGraph(self.genRandomGraph(self.n,self.p, rng))
         else:
-            self.graphDict = graphDict
+            self.setGraph(graphDict)
             self.n = len(self.graphDict)
 
 
    
-    def genRandomGraph(self,n,p):
+    def genRandomGraph(self,n,p, rng=None):
         """ Generate a random graph 
             
             @type n: integer
             @param n: number of nodes
             @type p: real[0,1]
             @param p: probability to have and edge between a pair of nodes
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
             
             @rtype: graph
             @return: a random graph with probability p
         """
+        if rng is None:
+            rng = np.random
         graph={}
         for i in range(n):
             graph[i] = []
         for i in range(n):
-            for j in range(i+1,n):
+            # one draw for i-j and one for j-i, for each j > i
+            r = rng.random_sample((n-i-1, 2)) <= p
+            for j in (np.flatnonzero(r[:, 0]) + i+1).tolist():
                 #edge i-j
-                r = random.random();
-                if r <= p:
-                    graph[i].append(j)
+                graph[i].append(j)
+            for j in (np.flatnonzero(r[:, 1]) + i+1).tolist():
                 #edge j-i
-                r = random.random();
-                if r <= p:
-                    graph[j].append(i)
+                graph[j].append(i)
         return graph    
     
-    def genRandomGraph_unbalanced(self,n,p, e_inf, e_sup):
+    def genRandomGraph_sparse(self, n, p, rng=None):
+        """ Generate a random graph with the same distribution of
+            genRandomGraph in O(n + m) time: the n(n-1) ordered pairs are
+            numbered and the selected ones are reached with geometric skips
+            (see skipSample), so the cost depends on the number of edges
+            produced and not on the number of pairs.
+
+            @type n: integer
+            @param n: number of nodes
+            @type p: real[0,1]
+            @param p: probability to have and edge between a pair of nodes
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
+            @rtype: CompactDirectedGraph
+            @return: a random graph with probability p
+        """
+        if rng is None:
+            rng = np.random
+        positions = list(skipSample(n*(n-1), p, rng))
+        positions = np.concatenate(positions) if len(positions) > 0 else np.zeros(0, dtype=np.int64)
+        return pairsToGraph(n, positions)
+
+    def genRandomGraph_gnm(self, n, m, rng=None):
+        """ Generate a G(n, m) random graph: exactly m distinct directed edges
+            (no self loops) chosen uniformly among the n(n-1) ordered pairs,
+            without any rejection loop (see samplePositions). The runtime is
+            predictable at any density.
+
+            @type n: integer
+            @param n: number of nodes
+            @type m: integer
+            @param m: number of edges (at most n(n-1))
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one),
+                        pass a seeded one for reproducible graphs
+
+            @rtype: CompactDirectedGraph
+            @return: a random graph with m edges
+        """
+        if rng is None:
+            rng = np.random
+        return pairsToGraph(n, samplePositions(n*(n-1), m, rng))
+
+    def genRandomGraph_unbalanced(self,n,p, e_inf, e_sup, rng=None):
         """ Generate a random graph with a limited number of edges. If the number
             of the edges is too little then the graph will be unbalanced.
+            The ordered pairs are scanned in order (see positionsToPairs) and
+            each free one is taken with probability p, in passes, until the
+            number of edges is reached: a pass reaches its pairs with
+            geometric skips (see skipSample), so its cost depends on the
+            edges it takes and not on the number of pairs.
             
             @type n: integer
             @param n: number of nodes
@@ -76,31 +284,40 @@ class RandomDirectedGraph(dg.NaiveDirectedGraph):
             @param e_inf: inferior limit of edges
             @type e_sup: integer            
             @param e_sup: superior limit of edges            
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
             
             @rtype: graph
             @return: a random graph with probability p
         """
         ''' Inizialization''' 
-        n_edges = random.randint(e_inf, e_sup)       
-        graph={}
-        for i in range(n):
-            graph[i] = set()
+        if rng is None:
+            rng = np.random
+        total = n*(n-1)
+        n_edges = min(rng.randint(e_inf, e_sup + 1), total)
+        chosen = np.zeros(0, dtype=np.int64) # sorted selected positions
+        
+        while len(chosen) < n_edges and p > 0:
+            picks = list(skipSample(total - len(chosen), p, rng))
+            if len(picks) == 0:
+                continue
+            # k-th free position: k plus the selected positions before it
+            picks = np.concatenate(picks)[:n_edges - len(chosen)]
+            before = chosen - np.arange(len(chosen))
+            picks += np.searchsorted(before, picks, side='right')
+            chosen = np.union1d(chosen, picks)
         
-        while n_edges > 0:
-            for i in range(n):
-                for j in range(n):
-                    if j not in graph[i] and j != i:
-                        r = random.random()
-                        if r <= p:
-                            graph[i].add(j)
-                            n_edges -= 1
-                            if n_edges <= 0:
-                                return graph
+        graph = {}
+        for i, out in self._toDict(n, pairsToGraph(n, chosen)).items():
+            graph[i] = set(out)
         return graph    
 
    
-    def genRandomGraph_control(self,n,p, e_inf, e_sup):
-        """ Generate a random graph with a limited number of edges
+    def genRandomGraph_control(self,n,p, e_inf, e_sup, rng=None):
+        """ Generate a random graph with a limited number of edges.
+            The edges are a uniform sample without replacement of the ordered
+            pairs (see samplePositions), so p does not change the
+            distribution of the graph.
             
             @type n: integer
             @param n: number of nodes
@@ -110,30 +327,38 @@ class RandomDirectedGraph(dg.NaiveDirectedGraph):
             @param e_inf: inferior limit of edges
             @type e_sup: integer            
             @param e_sup: superior limit of edges            
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
             
             @rtype: graph
             @return: a random graph with probability p
         """
         ''' Inizialization''' 
-        n_edges = random.randint(e_inf, e_sup)       
-        graph={}
-        for i in range(n):
-            graph[i] = []
+        if rng is None:
+            rng = np.random
+        n_edges = rng.randint(e_inf, e_sup + 1)       
         
         ''' Generating graph '''
-        while n_edges > 0: # create n_edges edges
-            find_pair = False
-            while find_pair == False: # generate a valid pair
-                v1 = random.randint(0, n-1)
-                v2 = random.randint(0, n-1)
-                if (v1 != v2) and v2 not in graph[v1]:
-                    find_pair = True;                    
-            # random graph property
-            r = random.random()
-            if r <= p:
-                graph[v1].append(v2)
-                n_edges -= 1
-        
+        return self._toDict(n, pairsToGraph(n, samplePositions(n*(n-1), n_edges, rng)))
+
+    def _toDict(self, n, compact):
+        """ Return the out-links of a compact graph with labels 0..n-1 as
+            a dictionary of lists
+
+            @type n: integer
+            @param n: number of nodes
+            @type compact: CompactDirectedGraph
+            @param compact: the graph
+
+            @rtype: graph
+            @return: the dictionary of the out-links
+        """
+        indptr, indices = compact.csr()
+        indptr = indptr.tolist()
+        indices = indices.tolist()
+        graph={}
+        for i in range(n):
+            graph[i] = indices[indptr[i]:indptr[i+1]]
         return graph
    
 if __name__ == "__main__":
@@ -182,3 +407,7 @@ if __name__ == "__main__":
     print "edges:"
     print graph.numOfEdges()
 
+    graph = RandomDirectedGraph(10**6, 1.0e-5, compact=True)
+    print "edges (compact, 10^6 nodes):"
+    print graph.numOfEdges()
+
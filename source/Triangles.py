@@ -0,0 +1,459 @@
+#----------------------------------------------------------------------
+# Triangles
+#
+# Contains the forward algorithm for counting the triangles of a graph over
+# degree-ordered CSR arrays, with the nodes split across a process pool, the
+# clustering measures built on it, kept up to date under edge insertions,
+# and their estimates by wedge sampling
+#
+# Author: Emanuele Pesce
+#----------------------------------------------------------------------
+import numpy as np
+import multiprocessing
+import math
+
+def undirectedCSR(indptr, indices):
+    """ Return the CSR arrays of the undirected simple graph underlying a
+        directed one: each edge in both directions, without self loops and
+        repetitions, the neighbors of each node sorted
+
+        @type indptr: array
+        @param indptr: CSR row pointers
+        @type indices: array
+        @param indices: CSR column indices
+
+        @rtype: tuple
+        @return: indptr and indices arrays of the undirected graph
+    """
+    n = len(indptr) - 1
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    dst = np.asarray(indices, dtype=np.int64)
+    keep = src != dst
+    codes = np.unique(np.concatenate((src[keep]*n + dst[keep], dst[keep]*n + src[keep])))
+    degree = np.bincount(codes // n, minlength=n)
+    return np.concatenate(([0], np.cumsum(degree))), codes % n
+
+
+def edgeCodes(indptr, indices):
+    """ Return the codes src*n + dst of the edges of a graph, sorted if the
+        neighbors of each node are
+    """
+    n = len(indptr) - 1
+    return np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))*n + indices
+
+
+def hasEdges(codes, n, src, dst):
+    """ Return which of the edges src -> dst are in a graph, given the sorted
+        codes of its edges (see edgeCodes)
+    """
+    if len(codes) == 0:
+        return np.zeros(len(src), dtype=bool)
+    query = src*n + dst
+    at = np.minimum(np.searchsorted(codes, query), len(codes) - 1)
+    return codes[at] == query
+
+
+def orientedCSR(indptr, indices):
+    """ Orient each edge of an undirected graph from the lower to the higher
+        node in the order of degree (ties by id), and renumber the nodes in
+        that order: every node keeps at most O(sqrt(m)) out-neighbors, and
+        each triangle is found once, from its lowest node.
+
+        @type indptr: array
+        @param indptr: CSR row pointers of the undirected graph
+        @type indices: array
+        @param indices: CSR column indices of the undirected graph
+
+        @rtype: tuple
+        @return: indptr and indices of the oriented graph (sorted neighbors)
+                 and the original id of each renumbered node
+    """
+    n = len(indptr) - 1
+    order = np.argsort(np.diff(indptr), kind="mergesort")
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    src = rank[np.repeat(np.arange(n), np.diff(indptr))]
+    dst = rank[indices]
+    keep = src < dst
+    codes = np.sort(src[keep]*n + dst[keep])
+    degree = np.bincount(codes // n, minlength=n)
+    return np.concatenate(([0], np.cumsum(degree))), codes % n, order
+
+
+def closedWedges(indptr, indices, codes, first, last):
+    """ Return the triangles whose lowest node is in [first, last) in an
+        oriented graph (see orientedCSR): every pair v < w of out-neighbors
+        of u is a wedge, closed if w is an out-neighbor of v (a binary search
+        in the sorted edges)
+
+        @type indptr: array
+        @param indptr: CSR row pointers of the oriented graph
+        @type indices: array
+        @param indices: CSR column indices of the oriented graph
+        @type codes: array
+        @param codes: sorted codes of the edges (see edgeCodes)
+        @type first: integer
+        @param first: first node
+        @type last: integer
+        @param last: last node (excluded)
+
+        @rtype: tuple
+        @return: arrays u, v, w of the nodes of the triangles
+    """
+    ''' the pairs of positions p < q in the same row '''
+    rowLength = np.diff(indptr[first:last + 1])
+    position = np.arange(indptr[first], indptr[last])
+    k = np.repeat(indptr[first + 1:last + 1], rowLength) - position - 1
+    total = int(k.sum())
+    p = np.repeat(position, k)
+    q = np.repeat(position + 1 - np.cumsum(k) + k, k) + np.arange(total)
+    u = np.repeat(np.repeat(np.arange(first, last), rowLength), k)
+    v = indices[p]
+    w = indices[q]
+    ''' closed wedges: the edge v -> w exists '''
+    found = hasEdges(codes, len(indptr) - 1, v, w)
+    return u[found], v[found], w[found]
+
+
+''' ========= process pool ========= '''
+worker = None # the graphs of a worker process
+
+def initWorker(indptr, indices, order, directed):
+    """ Keep the oriented graph in a worker process, once for all its tasks,
+        with the original id of each node and the sorted codes of the
+        directed edges (None if they are not counted)
+    """
+    global worker
+    worker = (indptr, indices, edgeCodes(indptr, indices), order, directed)
+
+
+def countChunk(bounds):
+    """ Triangles of each node from the lowest nodes in a range and, if the
+        directed edges are given, the directed edges among the out-neighbors
+        of each node (run by the workers)
+    """
+    indptr, indices, codes, order, directed = worker
+    n = len(indptr) - 1
+    u, v, w = closedWedges(indptr, indices, codes, bounds[0], bounds[1])
+    u = order[u]
+    v = order[v]
+    w = order[w]
+    triangles = np.bincount(np.concatenate((u, v, w)), minlength=n)
+    if directed is None:
+        return triangles
+    ''' i -> j, i -> k and j -> k, for each assignment of the corners '''
+    edges = np.zeros(n, dtype=np.int64)
+    for i, j, k in [(u, v, w), (u, w, v), (v, u, w), (v, w, u), (w, u, v), (w, v, u)]:
+        found = hasEdges(directed, n, i, j) & hasEdges(directed, n, i, k) & \
+                hasEdges(directed, n, j, k)
+        edges += np.bincount(i[found], minlength=n)
+    return np.vstack((triangles, edges))
+
+
+def chunkBounds(indptr, chunkSize):
+    """ Split the nodes of an oriented graph in ranges with about chunkSize
+        wedges each
+    """
+    n = len(indptr) - 1
+    if n == 0:
+        return []
+    degree = np.diff(indptr)
+    wedges = np.cumsum(degree*(degree - 1) // 2)
+    cuts = np.searchsorted(wedges, np.arange(chunkSize, wedges[-1], chunkSize))
+    cuts = np.unique(np.concatenate(([0], np.minimum(cuts + 1, n), [n])))
+    return zip(cuts[:-1], cuts[1:])
+
+
+def countTriangles(indptr, indices, processes=None, chunkSize=2**22, directed=None):
+    """ Count the triangles of each node of an undirected graph with the
+        forward algorithm: the edges are oriented by degree (see
+        orientedCSR) and the wedges of each node are closed with binary
+        searches, in chunks of nodes split across a pool of processes.
+        The directed edges among the out-neighbors of each node of a
+        directed graph lie in the triangles of the underlying undirected
+        graph, so they can be counted in the same pass.
+
+        @type indptr: array
+        @param indptr: CSR row pointers of the undirected graph
+        @type indices: array
+        @param indices: CSR column indices (see undirectedCSR)
+        @type processes: integer
+        @param processes: number of processes (default: the number of
+                          cores), 1 to compute in this process
+        @type chunkSize: integer
+        @param chunkSize: max number of wedges checked at a time
+        @type directed: tuple
+        @param directed: CSR arrays of the directed graph (same node ids,
+                         sorted neighbors) whose edges among out-neighbors
+                         are counted too
+
+        @rtype: array
+        @return: the number of triangles of each node id or, with directed,
+                 two rows: the triangles and the directed edges among the
+                 out-neighbors of each node id
+    """
+    n = len(indptr) - 1
+    oindptr, oindices, order = orientedCSR(indptr, indices)
+    codes = None
+    if directed is not None:
+        codes = edgeCodes(*directed)
+    chunks = chunkBounds(oindptr, chunkSize)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes == 1 or len(chunks) < 2:
+        initWorker(oindptr, oindices, order, codes)
+        partials = [countChunk(bounds) for bounds in chunks]
+    else:
+        pool = multiprocessing.Pool(processes, initWorker, (oindptr, oindices, order, codes))
+        try:
+            partials = pool.map(countChunk, chunks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    counts = np.zeros((1 if directed is None else 2, n), dtype=np.int64)
+    for partial in partials:
+        counts += partial
+    return counts[0] if directed is None else counts
+
+
+def clusteringStats(graph, processes=None):
+    """ Compute the triangle based measures of the undirected graph
+        underlying a graph (see undirectedCSR), from one count of the
+        triangles (see countTriangles)
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type processes: integer
+        @param processes: number of processes (default: the number of cores)
+
+        @rtype: tuple
+        @return: the triangles and the local clustering of each node id (0
+                 for nodes with less than 2 neighbors), the transitivity
+                 (closed / all length-2 paths), the number of length-2
+                 paths and the number of edges
+    """
+    indptr, indices = undirectedCSR(*graph.csr())
+    degree = np.diff(indptr)
+    triangles = countTriangles(indptr, indices, processes)
+    pairs = degree*(degree - 1) // 2
+    clustering = triangles / np.maximum(pairs, 1).astype(float)
+    paths = int(pairs.sum())
+    transitivity = float(triangles.sum()) / paths if paths > 0 else 0.0 # 3 per triangle
+    return triangles, clustering, transitivity, paths, len(indices) // 2
+
+
+def directedClustering(graph, processes=None):
+    """ Compute the local clustering of each node of a directed graph: the
+        fraction of the ordered pairs (j, k) of its out-neighbors with an
+        edge j -> k (see countTriangles)
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type processes: integer
+        @param processes: number of processes (default: the number of cores)
+
+        @rtype: array
+        @return: the local clustering of each node id (0 for nodes with less
+                 than 2 out-neighbors)
+    """
+    dindptr, dindices = graph.csr()
+    n = len(dindptr) - 1
+    indptr, indices = undirectedCSR(dindptr, dindices)
+    edges = countTriangles(indptr, indices, processes, directed=(dindptr, dindices))[1]
+    src = np.repeat(np.arange(n), np.diff(dindptr))
+    degree = np.bincount(src[src != dindices], minlength=n) # without self loops
+    return edges / np.maximum(degree*(degree - 1), 1).astype(float)
+
+
+''' ========= incremental counts ========= '''
+class TriangleIndex:
+    """ Triangles and clustering of the undirected graph underlying a graph,
+        kept up to date while vertices and edges are added: a new edge (u, v)
+        closes a triangle with each common neighbor of u and v, found by
+        scanning the smaller of the two neighbor sets, so an insertion costs
+        O(min(d(u), d(v))) and the measures are read in O(1).
+    """
+
+    def __init__(self, graph, processes=None):
+        """ Constructor: the initial counts come from the forward algorithm
+            (see countTriangles)
+
+            @type graph: CompactDirectedGraph
+            @param graph: the graph
+            @type processes: integer
+            @param processes: number of processes of the initial count
+        """
+        indptr, indices = undirectedCSR(*graph.csr())
+        labels = graph.labels.tolist()
+        degree = np.diff(indptr)
+        counts = countTriangles(indptr, indices, processes)
+        self.neighbors = {}
+        for i, v in enumerate(labels):
+            self.neighbors[v] = set(labels[j] for j in indices[indptr[i]:indptr[i+1]])
+        self.triangles = dict(zip(labels, counts.tolist()))
+        self.numTriangles = int(counts.sum() // 3)
+        self.numEdges = len(indices) // 2
+        self.wedges = int((degree*(degree - 1) // 2).sum())
+        self.clusteringSum = float((counts / np.maximum(degree*(degree - 1) // 2, 1).astype(float)).sum())
+
+    def clustering(self, vertex):
+        """ Return the local clustering of a vertex (0 with less than 2
+            neighbors)
+        """
+        d = len(self.neighbors[vertex])
+        if d < 2:
+            return 0.0
+        return self.triangles[vertex] / (d*(d - 1) / 2.0)
+
+    def averageClustering(self):
+        """ Return the average local clustering of the vertices """
+        if len(self.neighbors) == 0:
+            return 0.0
+        return self.clusteringSum / len(self.neighbors)
+
+    def transitivity(self):
+        """ Return the fraction of the length-2 paths which are closed """
+        if self.wedges == 0:
+            return 0.0
+        return 3.0*self.numTriangles / self.wedges
+
+    def addVertex(self, vertex):
+        """ Add an isolated vertex (nothing if it is already there) """
+        if vertex not in self.neighbors:
+            self.neighbors[vertex] = set()
+            self.triangles[vertex] = 0
+
+    def addEdge(self, vertex1, vertex2):
+        """ Add the edge between two vertices (nothing if they are not both
+            in the graph, if they are the same or already adjacent)
+        """
+        if vertex1 == vertex2 or vertex1 not in self.neighbors or vertex2 not in self.neighbors:
+            return
+        first = self.neighbors[vertex1]
+        second = self.neighbors[vertex2]
+        if vertex2 in first:
+            return
+        common = first & second if len(first) <= len(second) else second & first
+        touched = [vertex1, vertex2] + list(common)
+        before = sum(self.clustering(v) for v in touched)
+
+        self.wedges += len(first) + len(second)
+        first.add(vertex2)
+        second.add(vertex1)
+        for v in common:
+            self.triangles[v] += 1
+        self.triangles[vertex1] += len(common)
+        self.triangles[vertex2] += len(common)
+        self.numTriangles += len(common)
+        self.numEdges += 1
+        self.clusteringSum += sum(self.clustering(v) for v in touched) - before
+
+
+''' ========= sampling ========= '''
+def hoeffdingSamples(epsilon, confidence):
+    """ Return the number of samples of a [0, 1] variable whose mean is
+        within epsilon of the expectation with probability confidence
+        (Hoeffding bound)
+    """
+    return int(math.ceil(math.log(2.0 / (1.0 - confidence)) / (2.0*epsilon**2)))
+
+
+def hoeffdingBound(samples, confidence):
+    """ Return the half width of the confidence interval of the mean of
+        samples [0, 1] variables (Hoeffding bound)
+    """
+    return math.sqrt(math.log(2.0 / (1.0 - confidence)) / (2.0*samples))
+
+
+def closedFraction(indptr, codes, centers, rng):
+    """ Return the fraction of the wedges closed among one random wedge
+        (pair of distinct neighbors) for each center
+
+        @type indptr: array
+        @param indptr: CSR row pointers of the undirected graph
+        @type codes: array
+        @param codes: sorted codes of its edges (see edgeCodes)
+        @type centers: array
+        @param centers: node ids with at least 2 neighbors
+        @type rng: RandomState
+        @param rng: random generator
+    """
+    n = len(indptr) - 1
+    degree = np.diff(indptr)[centers]
+    i = (rng.random_sample(len(centers))*degree).astype(np.int64)
+    j = (rng.random_sample(len(centers))*(degree - 1)).astype(np.int64)
+    j += j >= i # a different neighbor
+    v = codes[indptr[centers] + i] % n
+    w = codes[indptr[centers] + j] % n
+    return hasEdges(codes, n, v, w).mean()
+
+
+def sampledClustering(graph, samples=None, epsilon=None, confidence=0.95, rng=None):
+    """ Estimate the average clustering and the transitivity of the
+        undirected graph underlying a graph by wedge sampling: the average
+        clustering is the probability that a random wedge of a uniform
+        random node is closed (nodes with less than 2 neighbors count as 0),
+        the transitivity is the probability that a uniform random wedge of
+        the graph is closed. With a number of samples independent of the
+        size of the graph, both are within the Hoeffding bound.
+
+        @type graph: CompactDirectedGraph
+        @param graph: the graph
+        @type samples: integer
+        @param samples: number of wedges sampled for each estimate
+        @type epsilon: real
+        @param epsilon: half width of the confidence intervals, which gives
+                        the number of samples (default: 0.01 if samples is
+                        not given)
+        @type confidence: real
+        @param confidence: confidence level of the intervals
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+
+        @rtype: tuple
+        @return: the average clustering, the transitivity and the half width
+                 of their confidence intervals
+    """
+    if rng is None:
+        rng = np.random
+    if samples is None:
+        samples = hoeffdingSamples(0.01 if epsilon is None else epsilon, confidence)
+    indptr, indices = undirectedCSR(*graph.csr())
+    n = len(indptr) - 1
+    degree = np.diff(indptr)
+    wedges = np.cumsum(degree*(degree - 1) // 2)
+    if n == 0 or wedges[-1] == 0:
+        return 0.0, 0.0, 0.0 # no wedges: exact
+    if samples < 1:
+        return 0.0, 0.0, 1.0
+    codes = edgeCodes(indptr, indices)
+
+    ''' average clustering: uniform nodes, the ones without wedges are open '''
+    nodes = rng.randint(0, n, size=samples)
+    nodes = nodes[degree[nodes] > 1]
+    clustering = 0.0
+    if len(nodes) > 0:
+        clustering = closedFraction(indptr, codes, nodes, rng)*len(nodes) / samples
+
+    ''' transitivity: centers chosen with probability proportional to their wedges '''
+    centers = np.searchsorted(wedges, rng.randint(0, wedges[-1], size=samples), side="right")
+    transitivity = closedFraction(indptr, codes, centers, rng)
+    return clustering, transitivity, hoeffdingBound(samples, confidence)
+
+
+if __name__ == "__main__":
+    import CompactDirectedGraph as cg
+    import time
+
+    ''' ====== TEST TRIANGLES ===== '''
+    for name in ["Facebook", "Wiki_Vote"]:
+        graph = cg.CompactDirectedGraph(filename="./../data/%s.txt" % name)
+        start = time.time()
+        triangles, clustering, transitivity, paths, edges = clusteringStats(graph)
+        print "--> %s: triangles, average clustering, transitivity (seconds)" % name
+        print triangles.sum() // 3, clustering.mean(), transitivity, time.time() - start
+        print "--> average directed clustering"
+        print directedClustering(graph).mean()
+        start = time.time()
+        print "--> sampled average clustering, transitivity, half width (seconds)"
+        print sampledClustering(graph), time.time() - start
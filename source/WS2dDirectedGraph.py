@@ -6,193 +6,533 @@
 # Author: Emanuele Pesce
 #----------------------------------------------------------------------
 import NaiveDirectedGraph as dg
-import random 
+import CompactDirectedGraph as cg
+import EdgeListIO as io
+import numpy as np
 import math
 
+STENCIL = [(0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)] # half of the 3x3 cells
+NEIGHBORS = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)] # all of them
+
+def gridCells(x, y, r):
+    """ Bucket points in square cells of side r
+
+        @type x: array
+        @param x: x coordinate of each point
+        @type y: array
+        @param y: y coordinate of each point
+        @type r: real
+        @param r: side of the cells
+
+        @rtype: tuple
+        @return: the cell of each point and the number of cells of a row
+                 of the grid (cell + width is the cell above)
+    """
+    side = float(r) if r > 0 else 1.0
+    cx = np.floor(x / side).astype(np.int64)
+    cy = np.floor(y / side).astype(np.int64)
+    cx -= cx.min() - 1 # a column of empty cells on both sides
+    cy -= cy.min()
+    width = cx.max() + 2
+    return cy*width + cx, width
+
+
+def iterClosePairs(xs, ys, cells, width, r, half=True, chunkSize=2**22):
+    """ Find the pairs of points at distance at most r, given the points
+        sorted by cell (see gridCells): a pair can only join a cell with
+        itself or with one of its 8 neighbors. Distances are checked in
+        vectorized chunks of candidate pairs.
+
+        @type xs: array
+        @param xs: x coordinate of each point
+        @type ys: array
+        @param ys: y coordinate of each point
+        @type cells: array
+        @param cells: sorted cell of each point
+        @type width: integer
+        @param width: number of cells of a row of the grid
+        @type r: real
+        @param r: radius
+        @type half: boolean
+        @param half: if True half of the neighbor cells are visited and each
+                     pair is found once, otherwise every point gets all its
+                     close points
+        @type chunkSize: integer
+        @param chunkSize: max number of candidate pairs checked at a time
+
+        @rtype: generator
+        @return: for each chunk of points [a, b), the tuple a, b, rows, cols
+                 of the pairs (positions in sorted order) whose row is in it
+    """
+    n = len(xs)
+    position = np.arange(n)
+
+    ''' candidate ranges (in sorted order) of each point for each cell '''
+    first = []
+    last = []
+    for dx, dy in (STENCIL if half else NEIGHBORS):
+        target = cells + dy*width + dx
+        if half and dx == 0 and dy == 0:
+            first.append(position + 1) # the same cell: each pair once
+        else:
+            first.append(np.searchsorted(cells, target, side="left"))
+        last.append(np.searchsorted(cells, target, side="right"))
+    counts = sum(l - f for f, l in zip(first, last))
+    bounds = np.searchsorted(np.cumsum(counts), np.arange(chunkSize, counts.sum(), chunkSize))
+
+    ''' distance check of the candidates, chunk by chunk '''
+    r2 = float(r)**2
+    for a, b in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [n]))):
+        rows = []
+        cols = []
+        for f, l in zip(first, last):
+            k = l[a:b] - f[a:b]
+            total = k.sum()
+            if total == 0:
+                continue
+            row = np.repeat(position[a:b], k)
+            col = np.repeat(f[a:b] - np.cumsum(k) + k, k) + np.arange(total)
+            close = (xs[row] - xs[col])**2 + (ys[row] - ys[col])**2 <= r2
+            if not half:
+                close &= row != col
+            rows.append(row[close])
+            cols.append(col[close])
+        if len(rows) > 0:
+            yield a, b, np.concatenate(rows), np.concatenate(cols)
+        else:
+            yield a, b, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+
+def strongTies(x, y, r, chunkSize=2**22):
+    """ Find all the pairs of points at distance at most r with a uniform
+        grid index: points are bucketed in square cells of side r (see
+        gridCells) and half of the neighbor cells are visited, so each pair
+        is found once (see iterClosePairs) and the cost is near-linear in
+        the number of points.
+
+        @type x: array
+        @param x: x coordinate of each point
+        @type y: array
+        @param y: y coordinate of each point
+        @type r: real
+        @param r: radius
+        @type chunkSize: integer
+        @param chunkSize: max number of candidate pairs checked at a time
+
+        @rtype: tuple
+        @return: arrays src and dst of the pairs, in both directions
+    """
+    n = len(x)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cells, width = gridCells(x, y, r)
+    order = np.argsort(cells, kind="mergesort")
+    src = []
+    dst = []
+    for a, b, rows, cols in iterClosePairs(x[order], y[order], cells[order], width, r,
+                                           chunkSize=chunkSize):
+        src.append(order[rows])
+        dst.append(order[cols])
+    src = np.concatenate(src)
+    dst = np.concatenate(dst)
+    return np.concatenate((src, dst)), np.concatenate((dst, src))
+
+
+def iterWS2dEdges(n, r, k, rng=np.random, batchSize=2**20):
+    """ Yield the edges of a WS-2D-graph (see
+        WS2dDirectedGraph.genWS2dGraph) in batches, sorted by source and
+        without repetitions, without holding the graph in memory (only the
+        coordinates are). The nodes are numbered in the order of the cells
+        of the grid index, so each batch holds a range of sources.
+
+        @type n: integer
+        @param n: number of nodes
+        @type r: integer
+        @param r: radius of the strong ties
+        @type k: integer
+        @param k: number of weak ties of each node
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: approximate number of edges of each batch
+
+        @rtype: generator
+        @return: pairs of arrays (sources, destinations)
+    """
+    if n < 1:
+        return
+    line = int(math.sqrt(n))
+    x = rng.random_sample(n)*line
+    y = rng.random_sample(n)*line
+    cells, width = gridCells(x, y, r)
+    order = np.argsort(cells, kind="mergesort")
+    x = x[order]
+    y = y[order]
+    for a, b, rows, cols in iterClosePairs(x, y, cells[order], width, r, half=False,
+                                           chunkSize=batchSize):
+        weakSrc = np.repeat(np.arange(a, b), k)
+        weakDst = rng.randint(0, n, size=len(weakSrc))
+        codes = np.concatenate((rows*n + cols, (weakSrc*n + weakDst)[weakSrc != weakDst]))
+        codes = np.unique(codes)
+        yield codes // n, codes % n
+
+
+def weakTies(n, k, rng=np.random):
+    """ Draw k random edges for each node (self loops are dropped)
+
+        @type n: integer
+        @param n: number of nodes
+        @type k: integer
+        @param k: number of random edges for each node
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+
+        @rtype: tuple
+        @return: arrays src and dst of the edges
+    """
+    src = np.repeat(np.arange(n), k)
+    dst = rng.randint(0, max(n, 1), size=len(src))
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def distinctTargets(need, existing, n, rng=np.random, chunkSize=2**22):
+    """ Draw, for each node u, need[u] distinct random targets which are not u
+        and do not make an edge of existing. Targets are drawn in batches
+        (larger for the nodes with few free targets) and the repeated or
+        existing edges are discarded. A node which needs more than half of
+        its free targets, or has less than n/2 of them, chooses among its
+        free targets listed explicitly instead (O(n), no more than its
+        existing edges or its new ones), as random draws would mostly be
+        discarded.
+
+        @type need: array
+        @param need: number of targets of each node (at most the number of
+                     its free targets)
+        @type existing: array
+        @param existing: sorted codes u*n + v of the existing edges
+        @type n: integer
+        @param n: number of nodes
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type chunkSize: integer
+        @param chunkSize: max number of free targets listed at a time
+
+        @rtype: tuple
+        @return: arrays src and dst of the new edges, grouped by source
+    """
+    need = need.copy()
+    free = n - 1 - np.bincount(existing // max(n, 1), minlength=n)[:n]
+    pieces = [] # codes of the new edges of the dense nodes
+
+    ''' dense nodes: random keys on the free targets, the need[u] smallest '''
+    dense = np.flatnonzero((need > 0) & ((2*need > free) | (2*free < n)))
+    own = existing[np.in1d(existing // max(n, 1), dense)]
+    step = max(chunkSize // max(n, 1), 1)
+    for first in range(0, len(dense), step):
+        group = dense[first:first + step]
+        rows = np.arange(len(group))
+        lo, hi = np.searchsorted(own, [group[0]*n, (group[-1] + 1)*n])
+        keys = rng.random_sample((len(group), n))
+        keys[rows, group] = 2.0 # no self loop
+        keys[np.searchsorted(group, own[lo:hi] // n), own[lo:hi] % n] = 2.0
+        order = np.argsort(keys, axis=1)[:, :need[group].max()]
+        take = np.arange(order.shape[1]) < need[group][:, None]
+        pieces.append((group[:, None]*n + order)[take])
+    need[dense] = 0
+
+    ''' the other nodes: random draws, the repeated ones are discarded '''
+    added = np.zeros(0, dtype=np.int64) # sorted codes of the new edges
+    while need.sum() > 0:
+        nodes = np.flatnonzero(need)
+        draws = np.ceil((need[nodes]*1.5 + 4)*n / np.maximum(free[nodes], 1)).astype(np.int64)
+        src = np.repeat(nodes, np.minimum(draws, 4*n + 16))
+        dst = rng.randint(0, n, size=len(src))
+        codes = src*n + dst
+        valid = src != dst
+        for known in (existing, added):
+            if len(known) > 0:
+                at = np.minimum(np.searchsorted(known, codes), len(known) - 1)
+                valid &= known[at] != codes
+        ''' first occurrence of each edge, then the first need[u] of each u '''
+        index = np.flatnonzero(valid)
+        index = np.sort(index[np.unique(codes[index], return_index=True)[1]])
+        src = src[index]
+        rank = np.arange(len(src)) - np.searchsorted(src, src)
+        take = index[rank < need[src]]
+        added = np.sort(np.concatenate((added, codes[take])))
+        count = np.bincount(codes[take] // n, minlength=n)
+        need -= count
+        free -= count
+    added = np.sort(np.concatenate(pieces + [added]))
+    return added // max(n, 1), added % max(n, 1)
+
+
 class WS2dDirectedGraph(dg.NaiveDirectedGraph):
     """ Watts-Strogats 2d Directed Graph class. Extends NaiveDirected Class.
+        The graph structure maps each node to the set of its neighbors, the
+        coordinates of the nodes are in the arrays self.x and self.y.
     """
-    
-    '''========= constructor ========='''    
-    def __init__(self, n=16, r=4, k=2, e_inf = 0, e_sup = 0, graphDict={}):
+
+    '''========= constructor ========='''
+    def __init__(self, n=16, r=4, k=2, e_inf = 0, e_sup = 0, graphDict={},
+                 compact=False, rng=None):
         """ Constructor
-            
+
             @type n: integer
             @param n: number of nodes
             @type r: integer
             @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
             @type k: integer
             @param k: number of random edges for each node u (weak ties)
-            @type graphDict: graph            
+            @type graphDict: graph
             @param graphDict: if graphDict is not passed, it will be generated
+            @type compact: boolean
+            @param compact: if True the graph is generated directly in a
+                            CompactDirectedGraph (see genWS2dGraph_compact
+                            and controlTies)
+            @type rng: RandomState
+            @param rng: random generator of the generated graph (default: the
+                        global numpy one)
         """
         self.r = r
         self.k = k
-        if e_sup > 0:
+        if compact and e_sup > 0:
+            self.n = n
+            src, dst = self.controlTies(self.n, self.r, self.k, e_inf, e_sup, rng)
+            self.setGraph(cg.CompactDirectedGraph(edges=(src, dst), labels=np.arange(n)).getGraph())
+        elif compact:
             self.n = n
-            self.graphDict = self.genWS2dGraph_control(self.n,self.r, self.k, e_inf, e_sup)
+            self.setGraph(self.genWS2dGraph_compact(self.n, self.r, self.k, rng).getGraph())
+        elif e_sup > 0:
+            self.n = n
+            self.setGraph(self.genWS2dGraph_control(self.n,self.r, self.k, e_inf, e_sup, rng))
         elif len(graphDict) < 1:
             self.n = n
-            self.graphDict = self.genWS2dGraph(self.n,self.r, self.k)
+            self.setGraph(self.genWS2dGraph(self.n,self.r, self.k, rng))
         else:
             self.n = len(graphDict)
-            self.graphDict = graphDict
+            self.setNodes(graphDict)
+
+    def setNodes(self, nodes):
+        """ Set the graph from a dictionary node -> {"x", "y", "list"} (the
+            structure of the nodes in the previous versions). A graph in a
+            plain dictionary structure is set as it is.
+
+            @type nodes: dictionary
+            @param nodes: nodes with their coordinates and neighbors
+        """
+        if len(nodes) > 0 and isinstance(nodes[next(iter(nodes))], dict):
+            vertices = list(nodes.keys())
+            self.x = np.array([nodes[v]["x"] for v in vertices])
+            self.y = np.array([nodes[v]["y"] for v in vertices])
+            self.setGraph(dict((v, nodes[v]["list"]) for v in vertices))
+        else:
+            self.setGraph(nodes)
+
+    def genCoordinates(self, n, rng=None):
+        """ Place n nodes uniformly at random in a square of side sqrt(n),
+            the coordinates are stored in self.x and self.y
+
+            @type n: integer
+            @param n: number of nodes
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+        """
+        if rng is None:
+            rng = np.random
+        line = int(math.sqrt(n))
+        self.x = rng.random_sample(n)*line
+        self.y = rng.random_sample(n)*line
+
+    def genTies(self, n, r, k, rng=None):
+        """ Place the nodes (see genCoordinates) and return the edges of a
+            WS-2D-graph: the strong ties, found with a grid index (see
+            strongTies), and k weak ties for each node (see weakTies)
+
+            @type n: integer
+            @param n: number of nodes
+            @type r: integer
+            @param r: radius of the strong ties
+            @type k: integer
+            @param k: number of weak ties of each node
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
 
-   
-    def genWS2dGraph(self, n, r, k):
-        """ 
+            @rtype: tuple
+            @return: arrays src and dst of the edges (with repetitions)
+        """
+        if rng is None:
+            rng = np.random
+        self.genCoordinates(n, rng)
+        strongSrc, strongDst = strongTies(self.x, self.y, r)
+        weakSrc, weakDst = weakTies(n, k, rng)
+        return np.concatenate((strongSrc, weakSrc)), np.concatenate((strongDst, weakDst))
+
+    def genWS2dGraph(self, n, r, k, rng=None):
+        """
             Generates a WS-2D-graph. This method is called by the constructors.
-            
+
             @type n: integer
             @param n: number of nodes
             @type r: integer
             @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
             @type k: integer
             @param k: number of random edges for each node u (weak ties)
-            
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
             @return: a WS 2d graph
         """
-        line = int(math.sqrt(n))
-        graph = dict()
-        ''' Initialization '''
-        for i in range(n):
-            x = random.random()
-            y = random.random()
-            graph[i] = dict()
-            graph[i]["x"] = x*line
-            graph[i]["y"] = y*line
-            graph[i]["list"] = set()
-            
-        ''' build SW 2d Graph '''
-        for i in range(n):
-            ''' 
-                set strong ties:
-                for each node u we set edge with all neighbors i a radious of r
-            '''
-            for j in range(i+1,n):               
-                dist=math.sqrt((graph[i]["x"]-graph[j]["x"])**2 +       (graph[i]["y"]-graph[j]["y"])**2) # Eclidean distance between i and j
-                if dist <= r:
-                    graph[i]["list"].add(j)               
-                    graph[j]["list"].add(i)
-            ''' 
-                set weak ties:
-                for each node u we set k edges to random nodes 
-            '''
-            for h in range(k):
-                s = random.randint(0,n-1)
-                if s != i:
-                    graph[i]["list"].add(s)                  
-        return graph
-        
-
-    def genWS2dGraph_control(self, n, r, vk, e_inf, e_sup):
-        """ 
-            Generates a WS-2D-graph with a limited number of edges.
-            
+        src, dst = self.genTies(n, r, k, rng)
+        return io.edgesToDict(np.arange(n), src, dst)
+
+    def genWS2dGraph_compact(self, n, r, k, rng=None):
+        """
+            Generates a WS-2D-graph in a CompactDirectedGraph, without building
+            the dictionary structure (suited for 10^6 nodes).
+
             @type n: integer
             @param n: number of nodes
             @type r: integer
             @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
+            @type k: integer
+            @param k: number of random edges for each node u (weak ties)
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
+            @rtype: CompactDirectedGraph
+            @return: a WS 2d graph
+        """
+        src, dst = self.genTies(n, r, k, rng)
+        return cg.CompactDirectedGraph(edges=(src, dst), labels=np.arange(n))
+
+
+    def controlTies(self, n, r, vk, e_inf, e_sup, rng=None):
+        """ Place the nodes (see genCoordinates) and return the edges of a
+            WS-2D-graph with a number of edges drawn in [e_inf, e_sup].
+            Nodes are visited in order, each one adds its strong ties (to
+            the following nodes, in both directions) and then a number of new
+            weak ties drawn from vk; the visits are repeated until the budget
+            is reached. The candidate strong ties are computed once (see
+            strongTies) and every visit is resolved with array operations, so
+            the cost is bounded by the budget and not by repeated scans.
+
+            @type n: integer
+            @param n: number of nodes
+            @type r: integer
+            @param r: radius of the strong ties
             @type vk: list
             @param vk: list of number of possible weak ties for each node
             @type e_inf: integer
             @param e_inf: inferior limit of edges
-            @type e_sup: integer            
-            @param e_sup: superior limit of edges 
-            
-            @return: a WS 2d graph
+            @type e_sup: integer
+            @param e_sup: superior limit of edges
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
+            @rtype: tuple
+            @return: arrays src and dst of the edges
         """
-        line = int(math.sqrt(n))
-        graph = dict()
-        n_edges = random.randint(e_inf, e_sup)
-        ''' Initialization '''
-        for i in range(n):
-            x = random.random()
-            y = random.random()
-            graph[i] = dict()
-            graph[i]["x"] = x*line
-            graph[i]["y"] = y*line
-            graph[i]["list"] = set()
-        
-        times = 0
-        ''' build SW 2d Graph '''
-        while n_edges > 0:
-            for i in range(n):
-                ''' 
-                    set strong ties:
-                    for each node u we set edge with all neighbors i a radious of r
-                '''
-                for j in range(i+1,n):               
-                    dist=math.sqrt((graph[i]["x"]-graph[j]["x"])**2 + (graph[i]["y"]-graph[j]["y"])**2) # Eclidean distance between i and j
-                    if dist <= r:
-                        if j not in graph[i]["list"]:
-                            graph[i]["list"].add(j)
-                            n_edges -= 1
-                            if n_edges <= 0:
-                                print times
-                                return graph
-                        if i not in graph[j]["list"]:
-                            graph[j]["list"].add(i)
-                            n_edges -= 1
-                            if n_edges <= 0:
-                                print times
-                                return graph
-                ''' 
-                    set weak ties:
-                    for each node u we set k edges to random nodes 
-                '''
-                times +=1
-                r1 = random.randint(0,len(vk)-1)
-                for h in range(vk[r1]):
-                    valid = False
-                    while valid == False:
-                        s = random.randint(0,n-1)
-                        if s != i and s not in graph[i]["list"]:
-                            valid = True
-                    graph[i]["list"].add(s) 
-                    n_edges -= 1
-                    if n_edges <= 0:
-                        print times
-                        return graph
-        return graph
+        if rng is None:
+            rng = np.random
+        vk = np.atleast_1d(vk)
+        budget = rng.randint(e_inf, e_sup + 1)
+        self.genCoordinates(n, rng)
 
+        ''' strong ties: the pairs (u, v), u < v, in the order of the visits '''
+        src, dst = strongTies(self.x, self.y, r)
+        half = len(src) // 2
+        low = np.minimum(src[:half], dst[:half])
+        high = np.maximum(src[:half], dst[:half])
+        order = np.argsort(low*n + high)
+        low = low[order]
+        high = high[order]
+        strongSrc = np.empty(2*half, dtype=np.int64)
+        strongDst = np.empty(2*half, dtype=np.int64)
+        strongSrc[0::2] = low
+        strongSrc[1::2] = high
+        strongDst[0::2] = high
+        strongDst[1::2] = low
+        owner = np.repeat(low, 2) # node whose visit adds the edge
+        strong = 2*np.bincount(low, minlength=n)
+        rank = np.arange(2*half) - np.repeat(np.cumsum(strong) - strong, strong)
 
-    
-    def getGraph(self):
-        """ 
-            Overwrite method plot of the superclass
-            
-            @type widthEdge: integer
-            @param widthEdge: Width of the edges to plot
+        existing = np.sort(strongSrc*n + strongDst)
+        degree = np.bincount(strongSrc, minlength=n)
+        chosenSrc = []
+        chosenDst = []
+        used = 0
+        first = True
+        while used < budget:
+            ''' edges added by each visit of this pass '''
+            weak = np.minimum(vk[rng.randint(0, len(vk), size=n)], n - 1 - degree)
+            takeStrong = strong if first else np.zeros(n, dtype=np.int64)
+            block = takeStrong + weak
+            if block.sum() == 0:
+                break # no edge can be added
+            ends = used + np.cumsum(block)
+            last = int(np.searchsorted(ends, budget))
+            if last < n: # the budget is reached while visiting node last
+                cut = budget - (ends[last] - block[last])
+                takeStrong = takeStrong.copy()
+                takeStrong[last+1:] = 0
+                takeStrong[last] = min(cut, takeStrong[last])
+                weak[last+1:] = 0
+                weak[last] = cut - takeStrong[last]
+            if first:
+                keep = rank < takeStrong[owner]
+                chosenSrc.append(strongSrc[keep])
+                chosenDst.append(strongDst[keep])
+            weakSrc, weakDst = distinctTargets(weak, existing, n, rng)
+            chosenSrc.append(weakSrc)
+            chosenDst.append(weakDst)
+            degree += np.bincount(weakSrc, minlength=n)
+            used += takeStrong.sum() + weak.sum()
+            first = False
+            if used < budget:
+                existing = np.sort(np.concatenate((existing, weakSrc*n + weakDst)))
+        if len(chosenSrc) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(chosenSrc), np.concatenate(chosenDst)
+
+    def genWS2dGraph_control(self, n, r, vk, e_inf, e_sup, rng=None):
         """
-        g = {}
-        graph = self.graphDict
-        for v in graph.keys():
-#            print v
-#            print graph[v]["list"]
-            g[v] = graph[v]["list"]      
-        gr = dg.NaiveDirectedGraph(graphDict=g)
-        return gr.getGraph()
-    
+            Generates a WS-2D-graph with a limited number of edges (see
+            controlTies).
+
+            @type n: integer
+            @param n: number of nodes
+            @type r: integer
+            @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
+            @type vk: list
+            @param vk: list of number of possible weak ties for each node
+            @type e_inf: integer
+            @param e_inf: inferior limit of edges
+            @type e_sup: integer
+            @param e_sup: superior limit of edges
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
+            @return: a WS 2d graph
+        """
+        src, dst = self.controlTies(n, r, vk, e_inf, e_sup, rng)
+        return io.edgesToDict(np.arange(n), src, dst)
+
+
+
     def plot(self, widthEdge=1):
-        """ 
+        """
             Overwrite method plot of the superclass
-            
+
             @type widthEdge: integer
             @param widthEdge: Width of the edges to plot
         """
-        g = {}
-        graph = self.graphDict
-        for v in graph.keys():
-#            print v
-#            print graph[v]["list"]
-            g[v] = graph[v]["list"]      
-        gToPlot = dg.NaiveDirectedGraph(graphDict=g)
-        gToPlot.plot(widthEdge=1)
-        
-        
-        
-    
+        dg.NaiveDirectedGraph.plot(self, widthEdge=widthEdge)
+
+
+
+
 if __name__ == "__main__":
     
     g = { "a" : ["b", "c"],
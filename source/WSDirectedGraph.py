@@ -6,88 +6,182 @@
 # Author: Emanuele Pesce
 #----------------------------------------------------------------------
 import NaiveDirectedGraph as dg
-import random 
+import CompactDirectedGraph as cg
+import WS2dDirectedGraph as ws2d
+import EdgeListIO as io
+import numpy as np
 import math
 
+def latticeTies(line, r, first=0, last=None):
+    """ Return the strong ties of a line x line grid: each node is connected
+        with every node whose row and column offsets are both at most r.
+        The stencil of offsets is applied to the whole grid at once, the
+        offsets going out of the grid are masked.
+
+        @type line: integer
+        @param line: side of the grid (node i*line+j is in row i, column j)
+        @type r: integer
+        @param r: radius of the strong ties
+        @type first: integer
+        @param first: first row of the source nodes
+        @type last: integer
+        @param last: row after the last row of the source nodes (default:
+                     line)
+
+        @rtype: tuple
+        @return: arrays src and dst of the edges
+    """
+    if last is None:
+        last = line
+    rows, cols = np.divmod(np.arange(first*line, last*line, dtype=np.int64), line)
+    src = []
+    dst = []
+    for x in range(-r, r+1):
+        for y in range(-r, r+1):
+            if x == 0 and y == 0:
+                continue
+            inside = (rows + x >= 0) & (rows + x < line) & (cols + y >= 0) & (cols + y < line)
+            nodes = np.flatnonzero(inside) + first*line
+            src.append(nodes)
+            dst.append(nodes + x*line + y)
+    if len(src) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(src), np.concatenate(dst)
+
+
+def iterLatticeEdges(n, r, k, rng=np.random, batchSize=2**20):
+    """ Yield the edges of a Watts-Strogats graph (see genWSGraph) in
+        batches of rows of the grid, sorted by source and without
+        repetitions, without holding the graph in memory
+
+        @type n: integer
+        @param n: number of nodes (the grid has int(sqrt(n))^2 nodes)
+        @type r: integer
+        @param r: radius of the strong ties
+        @type k: integer
+        @param k: number of weak ties of each node
+        @type rng: RandomState
+        @param rng: random generator (default: the global numpy one)
+        @type batchSize: integer
+        @param batchSize: approximate number of edges of each batch
+
+        @rtype: generator
+        @return: pairs of arrays (sources, destinations)
+    """
+    line = int(math.sqrt(n))
+    nodes = line*line
+    rows = max(batchSize // max(line*((2*r+1)**2 + k), 1), 1)
+    for first in range(0, line, rows):
+        last = min(first + rows, line)
+        src, dst = latticeTies(line, r, first, last)
+        weakSrc = np.repeat(np.arange(first*line, last*line), k)
+        weakDst = rng.randint(0, nodes, size=len(weakSrc))
+        codes = np.concatenate((src*nodes + dst, (weakSrc*nodes + weakDst)[weakSrc != weakDst]))
+        codes = np.unique(codes)
+        yield codes // nodes, codes % nodes
+
+
 class WSDirectedGraph(dg.NaiveDirectedGraph):
     """ Watts-Strogats Directed Graph class. Extends NaiveDirected Class.
     """
-    
-    '''========= constructor ========='''    
-    def __init__(self, n=16, r=4, k=2, graphDict={}):
+
+    '''========= constructor ========='''
+    def __init__(self, n=16, r=4, k=2, graphDict={}, compact=False, rng=None):
         """ Constructor
-        
+
             @type n: integer
             @param n: number of nodes
             @type r: integer
             @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
             @type k: integer
             @param k: number of random edges for each node u (weak ties)
-            @type graphDict: graph            
+            @type graphDict: graph
             @param graphDict: if graphDict is not passed, it will be generated
+            @type compact: boolean
+            @param compact: if True the graph is generated directly in a
+                            CompactDirectedGraph (see genWSGraph_compact)
+            @type rng: RandomState
+            @param rng: random generator of the generated graph (default: the
+                        global numpy one)
             Keyword arguments:
         """
         self.r = r
         self.k = k
-        if len(graphDict) < 1:
-            self.n = n           
-            self.graphDict = self.genWSGraph(self.n,self.r, self.k)
+        if compact:
+            self.n = n
+            self.setGraph(self.genWSGraph_compact(self.n, self.r, self.k, rng).getGraph())
+        elif len(graphDict) < 1:
+            self.n = n
+            self.setGraph(self.genWSGraph(self.n,self.r, self.k, rng))
         else:
+            self.setGraph(graphDict)
             self.n = len(self.graphDict)
-            self.graphDict = graphDict
 
-   
-    def genWSGraph(self, n, r, k):
+    def genTies(self, n, r, k, rng=None):
+        """ Return the edges of a Watts-Strogats graph: the strong ties of the
+            grid (see latticeTies) and k weak ties for each node, drawn in one
+            batch among the nodes of the grid (see WS2dDirectedGraph.weakTies)
+
+            @type n: integer
+            @param n: number of nodes (the grid has int(sqrt(n))^2 nodes)
+            @type r: integer
+            @param r: radius of the strong ties
+            @type k: integer
+            @param k: number of weak ties of each node
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
+            @rtype: tuple
+            @return: the number of nodes of the grid and the arrays src and
+                     dst of the edges (with repetitions)
+        """
+        if rng is None:
+            rng = np.random
+        line = int(math.sqrt(n))
+        strongSrc, strongDst = latticeTies(line, r)
+        weakSrc, weakDst = ws2d.weakTies(line*line, k, rng)
+        return line*line, np.concatenate((strongSrc, weakSrc)), np.concatenate((strongDst, weakDst))
+
+    def genWSGraph(self, n, r, k, rng=None):
         """ Generate a Watts-Strogats graph
-            
+
             @type n: integer
             @param n: number of nodes
             @type r: integer
             @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
             @type k: integer
             @param k: number of random edges for each node u (weak ties)
-            
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
             @return: a WS graph
             Keyword arguments:
         """
-        line = int(math.sqrt(n))
-        graph = {}
-        ''' Inizialization: 
-            we can see the graph as a grid where each node is identified 
-            by a number in range [0,n-1]
+        ''' we can see the graph as a grid where each node is identified
+            by a number in range [0,line*line-1]
         '''
-        for i in range(line):
-            for j in range(line):
-                graph[i*line+j] = set()      
-        ''' build WS graph '''
-        for i in range(line):
-            ''' set strong ties:
-                for each node u we set edge with all neighbors i a radious of r
-            '''
-            for j in range(line):
-                for x in range(r+1):
-                    for y in range(r+1):
-                        if x+y > 0: # the sum of offsets must be at least 1
-                            if i+x < line: # check for not going out the grid
-                                if   j+y < line:
-                                    graph[i*line+j].add((i+x)*line+(j+y))
-                                if  j-y >= 0:
-                                    graph[i*line+j].add((i+x)*line+(j-y))                      
-                            if i-x >= 0:
-                                if j+y < line:
-                                    graph[i*line+j].add((i-x)*line+(j+y))
-                                if j-y >= 0:
-                                    graph[i*line+j].add((i-x)*line+(j-y))
-                ''' weak ties:
-                    for each node u we set k edges to random nodes 
-                '''
-                for h in range(k):
-                    s = random.randint(0,n-1)
-                    if s != i*line+j: # s is not the current node
-                        graph[i*line+j].add(s)
-                
-#                        graph[s].add(i*line+j)              
-        return graph   
+        nodes, src, dst = self.genTies(n, r, k, rng)
+        return io.edgesToDict(np.arange(nodes), src, dst)
+
+    def genWSGraph_compact(self, n, r, k, rng=None):
+        """ Generate a Watts-Strogats graph in a CompactDirectedGraph, without
+            building the dictionary structure
+
+            @type n: integer
+            @param n: number of nodes
+            @type r: integer
+            @param r: radius of each node: a node u is connected with each other node at distance at most r (strong ties)
+            @type k: integer
+            @param k: number of random edges for each node u (weak ties)
+            @type rng: RandomState
+            @param rng: random generator (default: the global numpy one)
+
+            @rtype: CompactDirectedGraph
+            @return: a WS graph
+        """
+        nodes, src, dst = self.genTies(n, r, k, rng)
+        return cg.CompactDirectedGraph(edges=(src, dst), labels=np.arange(nodes))
+
 
      
 if __name__ == "__main__":